@@ -1,17 +1,121 @@
-from sentence_transformers import SentenceTransformer
+import os
+import threading
+import time
+
+import numpy as np
+
+import embedding_store
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+DEFAULT_BATCH_SIZE = 64
+
+# fp32 = PyTorch as downloaded, int8 = dynamic int8 quantization of the
+# Linear layers, onnx = exported ONNX graph on onnxruntime
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "fp32")
+# CPU threads for the forward pass (0 = library default); on the torch
+# backends this is the process-wide pool FaceNet also uses (FACE_THREADS)
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+
+# cached vectors / FAISS indexes are only valid for the backend that made them
+MODEL_KEY = MODEL_NAME if EMBEDDING_BACKEND == "fp32" else f"{MODEL_NAME}:{EMBEDDING_BACKEND}"
 
 model = None   # not loaded at import
+load_seconds = None
+_load_lock = threading.Lock()
+
+
+def load_model(backend: str = EMBEDDING_BACKEND, threads: int = EMBEDDING_THREADS):
+    """
+    A SentenceTransformer for MODEL_NAME on the given backend.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx":
+        model_kwargs = {}
+        if threads:
+            import onnxruntime
+
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = threads
+            model_kwargs["session_options"] = options
+
+        # exported on first use, then loaded from the local model cache
+        return SentenceTransformer(MODEL_NAME, backend="onnx", model_kwargs=model_kwargs)
+
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+
+    st_model = SentenceTransformer(MODEL_NAME, device="cpu")
+
+    if backend == "int8":
+        st_model = torch.quantization.quantize_dynamic(
+            st_model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    elif backend != "fp32":
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+
+    return st_model
 
 
 def get_model():
-    global model
+    global model, load_seconds
 
     if model is None:
-        print("🤖 Loading embedding model first time...")
-        model = SentenceTransformer("all-MiniLM-L6-v2")
+        with _load_lock:
+            if model is None:
+                print(f"🤖 Loading embedding model first time ({EMBEDDING_BACKEND})...")
+                started = time.perf_counter()
+                model = load_model()
+                load_seconds = round(time.perf_counter() - started, 3)
 
     return model
 
 
-def get_embedding(text: str):
-    return get_model().encode(text)
\ No newline at end of file
+def get_embeddings(texts, batch_size: int = DEFAULT_BATCH_SIZE, cache: bool = True) -> np.ndarray:
+    """
+    Encode many texts at once.
+
+    Cached vectors are read back; only the misses go through the model,
+    batch_size rows per forward pass. cache=False (search queries) skips
+    the on-disk cache entirely: no lookup, nothing written.
+
+    Returns:
+        np.ndarray (len(texts), dim) float32
+    """
+    texts = list(texts)
+    if not texts:
+        return np.empty((0, get_model().get_sentence_embedding_dimension()), dtype="float32")
+
+    if not cache:
+        return get_model().encode(
+            texts, batch_size=batch_size, convert_to_numpy=True
+        ).astype("float32")
+
+    keys = [embedding_store.content_hash(t) for t in texts]
+    cached = embedding_store.lookup(keys, MODEL_KEY)
+
+    # encode each distinct missing text once
+    missing = {}
+    for k, t in zip(keys, texts):
+        if k not in cached and k not in missing:
+            missing[k] = t
+
+    if missing:
+        encoded = get_model().encode(
+            list(missing.values()),
+            batch_size=batch_size,
+            convert_to_numpy=True,
+        ).astype("float32")
+
+        fresh = dict(zip(missing.keys(), encoded))
+        embedding_store.save(fresh, MODEL_KEY)
+        cached.update(fresh)
+
+    return np.vstack([cached[k] for k in keys]).astype("float32")
+
+
+def get_embedding(text: str, cache: bool = True):
+    # vectors are cached on disk, so unchanged text is never re-encoded
+    return get_embeddings([text], cache=cache)[0]
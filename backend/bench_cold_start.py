@@ -0,0 +1,70 @@
+# bench_cold_start.py
+#
+# Cold start of the backend: time from launching main.py to the first
+# successful /health, then until /ready reports every engine loaded:
+#   python bench_cold_start.py [runs]
+#
+# Stop any running backend first (port 8000).
+
+import json
+import subprocess
+import sys
+import time
+import urllib.request
+
+BASE_URL = "http://127.0.0.1:8000"
+
+
+def _get(path):
+    try:
+        with urllib.request.urlopen(BASE_URL + path, timeout=1) as r:
+            return json.loads(r.read())
+    except Exception:
+        return None
+
+
+def _wait_for(path, done, timeout=300):
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        body = _get(path)
+        if body is not None and done(body):
+            return body
+        time.sleep(0.05)
+    raise TimeoutError(path)
+
+
+def run_once():
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "main.py"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_for("/health", lambda b: b.get("status") == "ok")
+        t_health = time.perf_counter() - t0
+
+        status = _wait_for("/ready", lambda b: b["ready"] or any(
+            e["state"] == "failed" for e in b["engines"].values()
+        ))
+        t_ready = time.perf_counter() - t0
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    return t_health, t_ready, status["engines"]
+
+
+def main(runs):
+    print(f"{'run':>4} {'first /health s':>16} {'all engines s':>14}  engines (load s)")
+
+    for n in range(1, runs + 1):
+        t_health, t_ready, engines = run_once()
+        loads = ", ".join(
+            f"{name} {e.get('seconds', e['state'])}" for name, e in engines.items()
+        )
+        print(f"{n:>4} {t_health:>16.2f} {t_ready:>14.2f}  {loads}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
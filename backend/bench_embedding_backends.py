@@ -0,0 +1,99 @@
+# bench_embedding_backends.py
+#
+# Accuracy and throughput of the embedding backends against fp32 on the
+# stored memories:
+#   python bench_embedding_backends.py [backend ...] [--n 2000] [--threads 0] [--k 10]
+#
+# cosine   = similarity between a text's fp32 and backend vectors
+# recall@k = overlap of each memory's k nearest neighbours (fp32 vs backend)
+# Vectors are computed directly, the embedding cache is not touched.
+
+import argparse
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from ai import MODEL_NAME, DEFAULT_BATCH_SIZE, load_model
+from db import engine
+
+
+def load_corpus(n: int):
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("""
+                SELECT content FROM memories
+                WHERE content IS NOT NULL AND TRIM(content) != ''
+                ORDER BY RANDOM()
+                LIMIT :n
+            """),
+            {"n": n},
+        ).fetchall()
+    return [r[0] for r in rows]
+
+
+def encode(model, texts):
+    vectors = model.encode(texts, batch_size=DEFAULT_BATCH_SIZE, convert_to_numpy=True)
+    vectors = vectors.astype("float32")
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def neighbours(vectors, k: int):
+    sims = vectors @ vectors.T
+    np.fill_diagonal(sims, -np.inf)
+    return np.argsort(-sims, axis=1)[:, :k]
+
+
+def measure(backend: str, texts, threads: int):
+    started = time.perf_counter()
+    model = load_model(backend, threads)
+    load_s = time.perf_counter() - started
+
+    encode(model, texts[:DEFAULT_BATCH_SIZE])   # warm up
+
+    started = time.perf_counter()
+    vectors = encode(model, texts)
+    per_second = len(texts) / (time.perf_counter() - started)
+
+    return vectors, load_s, per_second
+
+
+def main(backends, n, threads, k):
+    texts = load_corpus(n)
+    if len(texts) <= k:
+        raise SystemExit("Not enough stored memories to benchmark (add documents first)")
+
+    print(f"{MODEL_NAME}: {len(texts)} memories, threads={threads or 'default'}, k={k}\n")
+    print(f"{'backend':<8} {'load s':>7} {'sent/s':>9} {'speedup':>8} {'cos mean':>9} {'cos min':>8} {f'recall@{k}':>10}")
+
+    reference, load_s, base_rate = measure("fp32", texts, threads)
+    reference_nn = neighbours(reference, k)
+    print(f"{'fp32':<8} {load_s:>7.1f} {base_rate:>9.1f} {1.0:>7.2f}x {1.0:>9.4f} {1.0:>8.4f} {1.0:>10.3f}")
+
+    for backend in backends:
+        if backend == "fp32":
+            continue
+
+        vectors, load_s, rate = measure(backend, texts, threads)
+
+        cosine = np.sum(reference * vectors, axis=1)
+        nn = neighbours(vectors, k)
+        recall = np.mean([
+            len(set(a) & set(b)) / k for a, b in zip(reference_nn, nn)
+        ])
+
+        print(
+            f"{backend:<8} {load_s:>7.1f} {rate:>9.1f} {rate / base_rate:>7.2f}x "
+            f"{cosine.mean():>9.4f} {cosine.min():>8.4f} {recall:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare embedding backends with fp32")
+    parser.add_argument("backends", nargs="*", default=["int8", "onnx"])
+    parser.add_argument("--n", type=int, default=2000, help="memories to sample")
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    main(args.backends, args.n, args.threads, args.k)
@@ -0,0 +1,78 @@
+# bench_face_embedding.py
+#
+# FaceNet engines against the eager reference on stored face crops (or
+# random crops when there are none yet):
+#   python bench_face_embedding.py [engine ...] [--faces 256] [--batch 1 8 32] [--threads N]
+#
+# parity = cosine similarity between an engine's embedding and the eager
+# embedding of the same crop (matching uses a 0.75 threshold, so the
+# minimum should stay far above the drift that would flip a match).
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+import face_embedding
+from face_detection import FACE_DIR
+
+
+def load_crops(n: int):
+    paths = sorted(Path(FACE_DIR).glob("*.jpg"))[:n]
+    crops = [np.asarray(Image.open(p).convert("RGB")) for p in paths]
+
+    if len(crops) < n:
+        rng = np.random.default_rng(0)
+        crops += [
+            rng.integers(0, 256, size=(rng.integers(60, 200), rng.integers(60, 200), 3), dtype=np.uint8)
+            for _ in range(n - len(crops))
+        ]
+        print(f"({len(paths)} stored crops, {n - len(paths)} random ones added)")
+
+    return crops
+
+
+def embed_all(crops, batch_size: int):
+    face_embedding.FACE_BATCH_SIZE = batch_size
+    started = time.perf_counter()
+    embeddings = face_embedding.get_face_embeddings(crops)
+    return np.stack(embeddings), len(crops) / (time.perf_counter() - started)
+
+
+def main(engines, n_faces, batch_sizes, threads):
+    import torch
+
+    # the engines are loaded directly, not through get_model()
+    if threads:
+        torch.set_num_threads(threads)
+    crops = load_crops(n_faces)
+
+    reference = None
+    print(f"{n_faces} faces, {torch.get_num_threads()} threads\n")
+    print(f"{'engine':<8} {'batch':>6} {'faces/s':>9} {'parity mean':>12} {'parity min':>11}")
+
+    for engine in ["eager"] + [e for e in engines if e != "eager"]:
+        face_embedding.model = face_embedding.load_model(engine)
+        embed_all(crops[:8], 8)   # warm up
+
+        for batch in batch_sizes:
+            embeddings, rate = embed_all(crops, batch)
+            if reference is None:
+                reference = embeddings
+
+            parity = np.sum(reference * embeddings, axis=1)
+            print(f"{engine:<8} {batch:>6} {rate:>9.1f} {parity.mean():>12.5f} {parity.min():>11.5f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare FaceNet engines with eager")
+    parser.add_argument("engines", nargs="*", default=["traced", "int8"])
+    parser.add_argument("--faces", type=int, default=256)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 8, 32])
+    # 0 = torch default
+    parser.add_argument("--threads", type=int, default=face_embedding.FACE_THREADS)
+    args = parser.parse_args()
+
+    main(args.engines, args.faces, args.batch, args.threads)
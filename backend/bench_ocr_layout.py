@@ -0,0 +1,186 @@
+# bench_ocr_layout.py
+#
+# Compares the columnar OCR layout grouping against the previous
+# row-by-row (DataFrame.iterrows) version on synthetic pages:
+#   python bench_ocr_layout.py [words_per_page ...]
+#
+# Both versions must produce identical chunks; timings exclude Tesseract.
+
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+from layout_ocr import chunks_from_ocr_data
+from document_grounding import clean_text, sentence_chunks
+
+
+def synthetic_page(n_words: int, seed: int = 0) -> dict:
+    """
+    image_to_data-shaped DICT: blocks of lines of words, with some tiny
+    blocks (merged), tall heading lines, punctuation and empty cells.
+    """
+    rng = random.Random(seed)
+    vocab = ["total", "invoice", "amount", "dbms", "notes", "page", "tax",
+             "due", "account", "balance", "2024", "INR", "paid", "ref"]
+
+    data = {k: [] for k in ["level", "page_num", "block_num", "par_num", "line_num",
+                            "word_num", "left", "top", "width", "height", "conf", "text"]}
+
+    block, y = 0, 0
+    while len(data["text"]) < n_words:
+        block += 1
+        n_lines = rng.choice([1, 1, 2, 4, 6, 10])
+        for line in range(1, n_lines + 1):
+            height = 40 if line == 1 and rng.random() < 0.3 else rng.randint(14, 18)
+            x = 0
+            for word in range(1, rng.randint(1, 12) + 1):
+                text = rng.choice(vocab)
+                if rng.random() < 0.08:
+                    text += rng.choice([".", "!", "?"])
+                if rng.random() < 0.03:
+                    text = " "
+                width = 9 * len(text)
+                for k, v in zip(data, [5, 1, block, 1, line, word, x, y, width, height, 90, text]):
+                    data[k].append(v)
+                x += width + 6
+            y += height + 4
+        y += 20
+
+    return data
+
+
+# ---- previous implementations (reference) ----
+
+def reference_layout_chunks(data):
+    df = pd.DataFrame(data)
+    df = df.dropna()
+    df = df[df.text.astype(str).str.strip() != ""]
+
+    blocks = {}
+    for _, row in df.iterrows():
+        blocks.setdefault(row["block_num"], []).append(row)
+
+    merged, buffer = [], []
+    for block in blocks.values():
+        text = " ".join(r["text"] for r in block)
+        if len(text.split()) < 5:
+            buffer.extend(block)
+        else:
+            if buffer:
+                merged.append(buffer)
+                buffer = []
+            merged.append(block)
+    if buffer:
+        merged.append(buffer)
+
+    chunks = []
+    for block in merged:
+        lines = {}
+        for r in block:
+            lines.setdefault(r["line_num"], []).append(r)
+
+        line_info = []
+        for words in lines.values():
+            text = " ".join(w["text"] for w in words)
+            height = sum(w["height"] for w in words) / len(words)
+            line_info.append((text.strip(), height))
+
+        bbox = [
+            int(min(r["left"] for r in block)),
+            int(min(r["top"] for r in block)),
+            int(max(r["left"] + r["width"] for r in block)),
+            int(max(r["top"] + r["height"] for r in block)),
+        ]
+
+        heights = sorted(h for _, h in line_info)
+        median = heights[len(heights) // 2]
+        first_text, first_height = line_info[0]
+
+        if first_height >= median * 1.3 or (
+            len(first_text) <= 40 and len(first_text.split()) <= 5
+        ):
+            heading = first_text
+            body_lines = [t for t, _ in line_info[1:]]
+        else:
+            heading = None
+            body_lines = [t for t, _ in line_info]
+
+        body = re.sub(r"\s+", " ", " ".join(body_lines)).strip()
+
+        start = 0
+        while start < len(body):
+            end = min(start + 450, len(body))
+            split = body.rfind(".", start, end)
+            if split <= start:
+                split = body.rfind(" ", start, end)
+            if split <= start:
+                split = end
+            chunk = body[start:split].strip()
+            if len(chunk) > 20:
+                chunks.append({"heading": heading, "content": chunk, "bbox": bbox})
+            start = split
+
+    return chunks
+
+
+def reference_sentence_chunks(df):
+    chunks, words = [], []
+    x1 = y1 = 1e9
+    x2 = y2 = 0
+
+    for _, row in df.iterrows():
+        text = row["text"]
+        left, top, width, height = (int(row["left"]), int(row["top"]),
+                                    int(row["width"]), int(row["height"]))
+        words.append(text)
+        x1, y1 = min(x1, left), min(y1, top)
+        x2, y2 = max(x2, left + width), max(y2, top + height)
+
+        joined = " ".join(words)
+        if text.endswith((".", "!", "?")) or len(joined) > 400:
+            cleaned = clean_text(joined)
+            if len(cleaned) > 20:
+                chunks.append({"content": cleaned, "bbox": [x1, y1, x2, y2]})
+            words = []
+            x1 = y1 = 1e9
+            x2 = y2 = 0
+
+    if words:
+        cleaned = clean_text(" ".join(words))
+        if len(cleaned) > 20:
+            chunks.append({"content": cleaned, "bbox": [x1, y1, x2, y2]})
+
+    return chunks
+
+
+def _time(fn, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return out, best * 1000
+
+
+def main(sizes):
+    print(f"{'words':>8} {'step':<10} {'iterrows ms':>12} {'columnar ms':>12} {'speedup':>8}  identical")
+
+    for n in sizes:
+        data = synthetic_page(n)
+
+        old, t_old = _time(reference_layout_chunks, data)
+        new, t_new = _time(chunks_from_ocr_data, data)
+        print(f"{n:>8} {'layout':<10} {t_old:>12.1f} {t_new:>12.1f} {t_old / t_new:>7.1f}x  {old == new}")
+
+        df = pd.DataFrame(data).dropna()
+        df = df[df.text.astype(str).str.strip() != ""]
+        old, t_old = _time(reference_sentence_chunks, df)
+        new, t_new = _time(sentence_chunks, df)
+        print(f"{n:>8} {'sentences':<10} {t_old:>12.1f} {t_new:>12.1f} {t_old / t_new:>7.1f}x  {old == new}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [500, 2000, 5000, 10000])
@@ -0,0 +1,160 @@
+# bench_sqlite_plans.py
+#
+# Query plans and timings of the hot SQL before and after the schema
+# migrations, on a synthetic database in a temp folder:
+#   python bench_sqlite_plans.py [documents] [chunks_per_document] [faces]
+#
+# "before" = base tables only (every explicit index dropped, user_version 0);
+# "after" = init_db again: its own indexes plus all migrations.
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# point db.py at a scratch database before it is imported
+SCRATCH = tempfile.mkdtemp(prefix="sqlite_plans_")
+os.environ["APPDATA"] = SCRATCH
+(Path(SCRATCH) / "AI_Memory_Assistant" / "storage").mkdir(parents=True)
+
+from sqlalchemy import text  # noqa: E402
+
+from db import engine  # noqa: E402
+from init_db import init_db  # noqa: E402
+
+QUERIES = {
+    "text search join": ("""
+        SELECT m.id, m.content, d.id AS document_id, d.filename
+        FROM memories m
+        LEFT JOIN document_memories dm ON dm.memory_id = m.id
+        LEFT JOIN documents d ON d.id = dm.document_id
+        WHERE m.id IN ({ids})
+    """, lambda p: {}),
+    "memories of document": (
+        "SELECT id FROM memories WHERE document_id = :doc",
+        lambda p: {"doc": p["doc"]},
+    ),
+    "document_memories of document": (
+        "SELECT memory_id FROM document_memories WHERE document_id = :doc",
+        lambda p: {"doc": p["doc"]},
+    ),
+    "faces by label": (
+        "SELECT image_path, label, id FROM faces WHERE LOWER(label) = LOWER(:label)",
+        lambda p: {"label": p["label"]},
+    ),
+    "upload dedup": ("""
+        SELECT d.id, j.id AS job_id
+        FROM documents d
+        LEFT JOIN ingest_jobs j ON j.document_id = d.id
+        WHERE d.content_hash = :h
+        ORDER BY j.created_at DESC
+        LIMIT 1
+    """, lambda p: {"h": p["hash"]}),
+}
+
+
+def populate(n_docs, chunks, n_faces):
+    rng = random.Random(0)
+    labels = [f"Person{i}" for i in range(200)]
+
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO documents (id, filename, file_path, file_type, content_hash)"
+                 " VALUES (:id, :f, :f, 'pdf', :h)"),
+            [{"id": d, "f": f"doc{d}.pdf", "h": f"{d:064x}"} for d in range(1, n_docs + 1)],
+        )
+        conn.execute(
+            text("INSERT INTO ingest_jobs (id, document_id, status) VALUES (:id, :d, 'done')"),
+            [{"id": f"job{d}", "d": d} for d in range(1, n_docs + 1)],
+        )
+        rows = [
+            {"id": d * chunks + c, "d": d, "c": f"chunk {c} of document {d}"}
+            for d in range(1, n_docs + 1)
+            for c in range(chunks)
+        ]
+        conn.execute(
+            text("INSERT INTO memories (id, content, document_id) VALUES (:id, :c, :d)"), rows
+        )
+        conn.execute(
+            text("INSERT INTO document_memories (document_id, memory_id) VALUES (:d, :id)"), rows
+        )
+        conn.execute(
+            text("INSERT INTO faces (id, image_path, label) VALUES (:id, :p, :l)"),
+            [
+                {"id": f"face{i}", "p": f"/photos/{i}.jpg",
+                 "l": rng.choice(labels) if rng.random() < 0.7 else None}
+                for i in range(n_faces)
+            ],
+        )
+
+    return [r["id"] for r in rows]
+
+
+def drop_indexes():
+    with engine.begin() as conn:
+        # sql IS NULL = automatic indexes of PRIMARY KEY / UNIQUE constraints
+        names = [
+            r[0] for r in conn.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")
+            )
+        ]
+        for name in names:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        conn.execute(text("DROP TABLE IF EXISTS sqlite_stat1"))
+        conn.execute(text("PRAGMA user_version = 0"))
+
+
+def measure(memory_ids, n_docs, repeat=20):
+    rng = random.Random(1)
+    report = {}
+
+    with engine.connect() as conn:
+        for name, (sql, params_for) in QUERIES.items():
+            runs, plan = [], None
+
+            for _ in range(repeat):
+                ids = rng.sample(memory_ids, 10)
+                params = params_for({
+                    "doc": rng.randint(1, n_docs),
+                    "label": f"person{rng.randint(0, 199)}",
+                    "hash": f"{rng.randint(1, n_docs):064x}",
+                })
+                query = sql.format(ids=",".join(map(str, ids)))
+
+                if plan is None:
+                    plan = [r[-1] for r in conn.execute(text("EXPLAIN QUERY PLAN " + query), params)]
+
+                t0 = time.perf_counter()
+                conn.execute(text(query), params).fetchall()
+                runs.append((time.perf_counter() - t0) * 1000)
+
+            report[name] = (statistics.median(runs), plan)
+
+    return report
+
+
+def main(n_docs, chunks, n_faces):
+    init_db()
+    drop_indexes()
+    memory_ids = populate(n_docs, chunks, n_faces)
+    print(f"{n_docs} documents, {len(memory_ids)} memories, {n_faces} faces\n")
+
+    before = measure(memory_ids, n_docs)
+
+    init_db()
+
+    after = measure(memory_ids, n_docs)
+
+    for name in QUERIES:
+        (t_before, plan_before), (t_after, plan_after) = before[name], after[name]
+        print(f"== {name}: {t_before:.2f} ms -> {t_after:.2f} ms ({t_before / max(t_after, 1e-6):.1f}x)")
+        print("   before: " + " | ".join(plan_before))
+        print("   after:  " + " | ".join(plan_after))
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [2000, 50, 50000][len(args):]))
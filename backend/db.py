@@ -1,6 +1,6 @@
 import os
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from pathlib import Path
 
 
@@ -15,8 +15,23 @@ DB_PATH = STORAGE_DIR / "AI_memory.db"
 
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
+# per-connection tuning (WAL itself is persistent, set in init_db)
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", str(64 * 1024)))
+
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False}
 )
 
+
+@event.listens_for(engine, "connect")
+def _set_pragmas(dbapi_conn, _):
+    cursor = dbapi_conn.cursor()
+    # NORMAL is durable across app crashes under WAL (only power loss can
+    # drop the last commits) and skips an fsync per transaction
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
@@ -4,11 +4,9 @@ from typing import List, Dict
 import re
 
 # ---------- IMAGE OCR ----------
-import pytesseract
-from PIL import Image
-
-# ---------- PDF ----------
-import fitz  # PyMuPDF
+# (pandas and PyMuPDF are imported on first use: they are slow to load)
+from layout_ocr import chunks_from_ocr_data
+from ocr_executor import ocr_image, ocr_pdf_pages
 
 
 # =========================================================
@@ -28,61 +26,64 @@ def extract_image_chunks(image_path: str) -> List[Dict]:
     ]
     """
 
-    img = Image.open(image_path)
+    import pandas as pd
 
-    df = pytesseract.image_to_data(
-        img,
-        output_type=pytesseract.Output.DATAFRAME
-    )
+    # OCR runs in the process pool (tall images as parallel bands)
+    df = pd.DataFrame(ocr_image(image_path))
 
     df = df.dropna()
-    df = df[df.text.str.strip() != ""]
+    df = df[df.text.astype(str).str.strip() != ""]
+
+    return sentence_chunks(df)
 
-    chunks = []
 
-    words = []
-    x1 = y1 = 1e9
-    x2 = y2 = 0
-
-    for _, row in df.iterrows():
-        text = row["text"]
-        left, top, width, height = (
-            int(row["left"]),
-            int(row["top"]),
-            int(row["width"]),
-            int(row["height"]),
-        )
-
-        words.append(text)
-
-        x1 = min(x1, left)
-        y1 = min(y1, top)
-        x2 = max(x2, left + width)
-        y2 = max(y2, top + height)
-
-        # Chunk break (sentence or size)
-        joined = " ".join(words)
-        if text.endswith((".", "!", "?")) or len(joined) > 400:
-            cleaned = clean_text(joined)
-
-            if len(cleaned) > 20:
-                chunks.append({
-                    "content": cleaned,
-                    "bbox": [x1, y1, x2, y2],
-                })
-
-            # reset
-            words = []
-            x1 = y1 = 1e9
-            x2 = y2 = 0
+def sentence_chunks(df) -> List[Dict]:
+    """
+    Split OCR words (image_to_data rows, in reading order) into chunks at
+    sentence ends or once a chunk passes 400 characters.
+    """
+    if df.empty:
+        return []
+
+    words = df.text.astype(str).tolist()
+    lengths = df.text.astype(str).str.len().to_numpy()
+    sentence_end = df.text.astype(str).str.contains(r"[.!?]\Z", regex=True).to_numpy()
+
+    left = df.left.to_numpy().astype("int64")
+    top = df.top.to_numpy().astype("int64")
+    right = left + df.width.to_numpy().astype("int64")
+    bottom = top + df.height.to_numpy().astype("int64")
+
+    # chunk boundaries: only integer bookkeeping per word, strings are
+    # joined once per chunk
+    bounds = []
+    start = 0
+    joined_len = -1
+    for i in range(len(words)):
+        joined_len += lengths[i] + 1
+        if sentence_end[i] or joined_len > 400:
+            bounds.append((start, i + 1))
+            start = i + 1
+            joined_len = -1
 
     # leftover
-    if words:
-        cleaned = clean_text(" ".join(words))
+    if start < len(words):
+        bounds.append((start, len(words)))
+
+    chunks = []
+
+    for s, e in bounds:
+        cleaned = clean_text(" ".join(words[s:e]))
+
         if len(cleaned) > 20:
             chunks.append({
                 "content": cleaned,
-                "bbox": [x1, y1, x2, y2],
+                "bbox": [
+                    int(left[s:e].min()),
+                    int(top[s:e].min()),
+                    int(right[s:e].max()),
+                    int(bottom[s:e].max()),
+                ],
             })
 
     return chunks
@@ -95,23 +96,32 @@ def extract_image_chunks(image_path: str) -> List[Dict]:
 def extract_pdf_chunks(pdf_path: str) -> List[Dict]:
     """
     Extract text chunks from PDF with page number and bounding boxes.
+    Pages without a text layer (scans) are OCR'd in parallel.
 
     Returns:
     [
       {
         "content": "...",
         "page": 0,
-        "bbox": [x1, y1, x2, y2]
+        "bbox": [x1, y1, x2, y2],
+        "heading": "..."          # OCR'd pages only
       }
     ]
     """
 
+    import fitz  # PyMuPDF
+
     doc = fitz.open(pdf_path)
     chunks = []
+    scanned_pages = []
 
     for page_index, page in enumerate(doc):
         blocks = page.get_text("blocks")
 
+        if not any(b[4].strip() for b in blocks):
+            scanned_pages.append(page_index)
+            continue
+
         for block in blocks:
             x1, y1, x2, y2, text, *_ = block
 
@@ -126,6 +136,26 @@ def extract_pdf_chunks(pdf_path: str) -> List[Dict]:
                 "bbox": [int(x1), int(y1), int(x2), int(y2)],
             })
 
+    doc.close()
+
+    for page_index, (data, scale) in ocr_pdf_pages(pdf_path, scanned_pages).items():
+        for chunk in chunks_from_ocr_data(data):
+            text = clean_text(chunk["content"])
+
+            if len(text) < 20:
+                continue
+
+            chunks.append({
+                "content": text,
+                "page": page_index,
+                # rendered pixels -> PDF points, like the text-layer bboxes
+                "bbox": [int(v * scale) for v in chunk["bbox"]],
+                "heading": chunk["heading"],
+            })
+
+    # keep page order with OCR'd pages mixed in
+    chunks.sort(key=lambda c: c["page"])
+
     return chunks
 
 
@@ -0,0 +1,158 @@
+# embedding_store.py
+
+import hashlib
+import re
+import threading
+
+import numpy as np
+from sqlalchemy import text, bindparam
+
+from db import engine
+
+# SQLite has a cap on bound variables per statement
+_LOOKUP_BATCH = 500
+
+_lock = threading.Lock()
+_active_model = None
+
+stats = {"hits": 0, "misses": 0}
+
+
+def normalize(content: str) -> str:
+    return re.sub(r"\s+", " ", content or "").strip()
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(normalize(content).encode("utf-8")).hexdigest()
+
+
+def _ensure_model(model: str):
+    """
+    Vectors from another model are useless (and may have another size),
+    so the first access with a new model name drops them.
+    """
+    global _active_model
+
+    if _active_model == model:
+        return
+
+    with _lock:
+        if _active_model == model:
+            return
+
+        with engine.begin() as conn:
+            deleted = conn.execute(
+                text("DELETE FROM embedding_cache WHERE model != :m"),
+                {"m": model},
+            ).rowcount
+
+        if deleted:
+            print(f"♻️ Embedding cache invalidated ({deleted} vectors from old model)")
+
+        _active_model = model
+
+
+def lookup(hashes, model: str) -> dict:
+    """
+    Returns: content_hash -> np.ndarray (float32) for every cached hash
+    """
+    _ensure_model(model)
+
+    hashes = list(dict.fromkeys(hashes))
+    found = {}
+
+    query = text("""
+        SELECT content_hash, vector
+        FROM embedding_cache
+        WHERE model = :m AND content_hash IN :hashes
+    """).bindparams(bindparam("hashes", expanding=True))
+
+    with engine.connect() as conn:
+        for i in range(0, len(hashes), _LOOKUP_BATCH):
+            rows = conn.execute(
+                query,
+                {"m": model, "hashes": hashes[i:i + _LOOKUP_BATCH]},
+            ).fetchall()
+
+            for h, blob in rows:
+                found[h] = np.frombuffer(blob, dtype="float32")
+
+    with _lock:
+        stats["hits"] += len(found)
+        stats["misses"] += len(hashes) - len(found)
+
+    return found
+
+
+def save(vectors: dict, model: str):
+    """
+    vectors: content_hash -> embedding
+    """
+    if not vectors:
+        return
+
+    _ensure_model(model)
+
+    rows = [
+        {
+            "h": h,
+            "m": model,
+            "v": np.asarray(v, dtype="float32").tobytes(),
+        }
+        for h, v in vectors.items()
+    ]
+
+    with engine.begin() as conn:
+        conn.execute(
+            text("""
+                INSERT OR REPLACE INTO embedding_cache (content_hash, model, vector)
+                VALUES (:h, :m, :v)
+            """),
+            rows,
+        )
+
+
+def forget(contents):
+    """
+    Drop the cached vectors of deleted memories' contents, unless another
+    memory still holds the same text.
+    """
+    contents = list(dict.fromkeys(c for c in contents if c))
+    if not contents:
+        return
+
+    with engine.begin() as conn:
+        still_used = set()
+        for i in range(0, len(contents), _LOOKUP_BATCH):
+            still_used.update(
+                r[0] for r in conn.execute(
+                    text("SELECT content FROM memories WHERE content IN :c")
+                    .bindparams(bindparam("c", expanding=True)),
+                    {"c": contents[i:i + _LOOKUP_BATCH]},
+                )
+            )
+
+        hashes = list({content_hash(c) for c in contents if c not in still_used})
+        for i in range(0, len(hashes), _LOOKUP_BATCH):
+            conn.execute(
+                text("DELETE FROM embedding_cache WHERE content_hash IN :h")
+                .bindparams(bindparam("h", expanding=True)),
+                {"h": hashes[i:i + _LOOKUP_BATCH]},
+            )
+
+
+def get_stats() -> dict:
+    with engine.connect() as conn:
+        size = conn.execute(text("SELECT COUNT(*) FROM embedding_cache")).scalar()
+
+    with _lock:
+        hits, misses = stats["hits"], stats["misses"]
+
+    total = hits + misses
+    return {
+        "model": _active_model,
+        "vectors": size,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else None,
+    }
@@ -1,7 +1,23 @@
 # face_clustering.py
 
+import os
+import threading
+
+import faiss
 import numpy as np
-from sklearn.cluster import DBSCAN
+from sqlalchemy import text, bindparam
+
+EMBEDDING_DIM = 512
+
+# cosine similarity to a centroid needed to join its cluster
+CLUSTER_THRESHOLD = float(os.getenv("FACE_CLUSTER_THRESHOLD", "0.7"))
+# centroids at least this similar are merged
+MERGE_THRESHOLD = float(os.getenv("FACE_CLUSTER_MERGE_THRESHOLD", "0.85"))
+# clusters whose mean similarity to their centroid drops below this are re-split
+SPLIT_COHESION = float(os.getenv("FACE_CLUSTER_SPLIT_COHESION", "0.6"))
+SPLIT_MIN_SIZE = int(os.getenv("FACE_CLUSTER_SPLIT_MIN_SIZE", "20"))
+# assignments between merge / split passes
+MAINTAIN_EVERY = int(os.getenv("FACE_CLUSTER_MAINTAIN_EVERY", "500"))
 
 
 def cluster_face_embeddings(
@@ -23,6 +39,8 @@ def cluster_face_embeddings(
     if not embeddings:
         return {}
 
+    from sklearn.cluster import DBSCAN
+
     face_ids = [f[0] for f in embeddings]
     X = np.vstack([f[1] for f in embeddings])
 
@@ -38,3 +56,341 @@ def cluster_face_embeddings(
         face_id: int(label)
         for face_id, label in zip(face_ids, labels)
     }
+
+
+# =========================================================
+# ONLINE CLUSTERING (one centroid lookup per new face)
+# =========================================================
+
+class OnlineFaceClusters:
+    """
+    Incremental identity clusters.
+
+    Every cluster keeps the sum of its member embeddings (face_clusters
+    table); the normalized sums are the centroids in a small FAISS index.
+    A new face joins its nearest centroid or opens a new cluster, and
+    faces.cluster_id records the assignment. Drift is corrected by
+    maintain(): near-duplicate centroids are merged and loose clusters
+    are re-split with DBSCAN.
+
+    Methods taking `conn` write through the caller's transaction.
+    """
+
+    def __init__(self):
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(EMBEDDING_DIM))
+        self.sums = {}    # cluster_id -> sum of member embeddings
+        self.sizes = {}   # cluster_id -> member count
+        self.since_maintenance = 0
+        self.lock = threading.RLock()
+
+    # ---- STATE ----
+
+    def load(self, conn):
+        rows = conn.execute(
+            text("SELECT id, size, vector_sum FROM face_clusters")
+        ).fetchall()
+
+        with self.lock:
+            self.index.reset()
+            self.sums = {
+                r.id: np.frombuffer(r.vector_sum, dtype="float32").copy()
+                for r in rows
+            }
+            self.sizes = {r.id: r.size for r in rows}
+
+            if rows:
+                ids = np.array(list(self.sums), dtype="int64")
+                self.index.add_with_ids(
+                    np.stack([self._centroid(c) for c in ids]), ids
+                )
+
+        return len(rows)
+
+    def _centroid(self, cluster_id):
+        s = self.sums[cluster_id]
+        return (s / max(float(np.linalg.norm(s)), 1e-12)).astype("float32")
+
+    def _refresh(self, cluster_id):
+        ids = np.array([cluster_id], dtype="int64")
+        self.index.remove_ids(ids)
+        if self.sizes.get(cluster_id, 0) > 0:
+            self.index.add_with_ids(self._centroid(cluster_id).reshape(1, -1), ids)
+
+    def _new_cluster(self, conn):
+        cluster_id = conn.execute(
+            text("INSERT INTO face_clusters (size, vector_sum) VALUES (0, :v)"),
+            {"v": np.zeros(EMBEDDING_DIM, dtype="float32").tobytes()},
+        ).lastrowid
+        self.sums[cluster_id] = np.zeros(EMBEDDING_DIM, dtype="float32")
+        self.sizes[cluster_id] = 0
+        return cluster_id
+
+    def _write(self, conn, cluster_ids):
+        alive = [c for c in cluster_ids if self.sizes.get(c, 0) > 0]
+        dead = [c for c in cluster_ids if self.sizes.get(c, 0) <= 0]
+
+        if alive:
+            conn.execute(
+                text("""
+                    UPDATE face_clusters
+                    SET size = :size, vector_sum = :v, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = :id
+                """),
+                [
+                    {"id": c, "size": self.sizes[c], "v": self.sums[c].tobytes()}
+                    for c in alive
+                ],
+            )
+
+        if dead:
+            conn.execute(
+                text("DELETE FROM face_clusters WHERE id IN :ids")
+                .bindparams(bindparam("ids", expanding=True)),
+                {"ids": dead},
+            )
+            for c in dead:
+                self.sums.pop(c, None)
+                self.sizes.pop(c, None)
+
+    # ---- ASSIGNMENT ----
+
+    def assign(self, conn, embeddings) -> list:
+        """
+        Args:
+            embeddings: list of (512,) L2-normalized embeddings
+
+        Returns:
+            cluster_id per embedding
+        """
+        cluster_ids = []
+        touched = set()
+
+        with self.lock:
+            for emb in embeddings:
+                emb = np.asarray(emb, dtype="float32").reshape(-1)
+
+                cluster_id = None
+                if self.index.ntotal:
+                    scores, ids = self.index.search(emb.reshape(1, -1), 1)
+                    if ids[0, 0] != -1 and scores[0, 0] >= CLUSTER_THRESHOLD:
+                        cluster_id = int(ids[0, 0])
+
+                if cluster_id is None:
+                    cluster_id = self._new_cluster(conn)
+
+                self.sums[cluster_id] += emb
+                self.sizes[cluster_id] += 1
+                self._refresh(cluster_id)
+
+                touched.add(cluster_id)
+                cluster_ids.append(cluster_id)
+
+            self._write(conn, touched)
+            self.since_maintenance += len(embeddings)
+
+        return cluster_ids
+
+    def unassign(self, conn, cluster_id, embedding):
+        """
+        Take a deleted face out of its cluster.
+        """
+        with self.lock:
+            if cluster_id not in self.sums:
+                return
+
+            self.sums[cluster_id] -= np.asarray(embedding, dtype="float32").reshape(-1)
+            self.sizes[cluster_id] -= 1
+            self._refresh(cluster_id)
+            self._write(conn, [cluster_id])
+
+    def backfill(self, conn, embeddings_for):
+        """
+        Assign faces stored before clustering existed.
+
+        embeddings_for: face_ids -> {face_id: embedding}
+        """
+        face_ids = [
+            r[0] for r in conn.execute(
+                text("SELECT id FROM faces WHERE cluster_id IS NULL")
+            ).fetchall()
+        ]
+        embeddings = embeddings_for(face_ids) if face_ids else {}
+        if not embeddings:
+            return 0
+
+        face_ids = list(embeddings)
+        cluster_ids = self.assign(conn, [embeddings[f] for f in face_ids])
+
+        conn.execute(
+            text("UPDATE faces SET cluster_id = :c WHERE id = :id"),
+            [{"c": c, "id": f} for f, c in zip(face_ids, cluster_ids)],
+        )
+        # labels given per face before clusters existed move to the cluster
+        conn.execute(text("""
+            UPDATE face_clusters
+            SET label = (
+                SELECT label FROM faces
+                WHERE faces.cluster_id = face_clusters.id AND label IS NOT NULL
+                LIMIT 1
+            )
+            WHERE label IS NULL
+        """))
+        return len(face_ids)
+
+    # ---- MERGE / SPLIT ----
+
+    def maintenance_due(self) -> bool:
+        return self.since_maintenance >= MAINTAIN_EVERY
+
+    def maintain(self, conn, embeddings_for):
+        """
+        Merge clusters whose centroids are nearest neighbours above
+        MERGE_THRESHOLD, then re-split loose clusters with DBSCAN.
+
+        Returns:
+            {"merged": n, "split": n}
+        """
+        with self.lock:
+            merged = self._merge(conn)
+            split = self._split(conn, embeddings_for)
+            self.since_maintenance = 0
+
+        return {"merged": merged, "split": split}
+
+    def _merge(self, conn):
+        if self.index.ntotal < 2:
+            return 0
+
+        ids = list(self.sums)
+        scores, nearest = self.index.search(np.stack([self._centroid(c) for c in ids]), 2)
+
+        parent = {c: c for c in ids}
+
+        def root(c):
+            while parent[c] != c:
+                parent[c] = parent[parent[c]]
+                c = parent[c]
+            return c
+
+        for cluster_id, row_scores, row_ids in zip(ids, scores, nearest):
+            for score, other in zip(row_scores, row_ids):
+                other = int(other)
+                if other != -1 and other != cluster_id and score >= MERGE_THRESHOLD:
+                    parent[root(other)] = root(cluster_id)
+
+        groups = {}
+        for c in ids:
+            groups.setdefault(root(c), []).append(c)
+
+        merged = 0
+        for members in groups.values():
+            if len(members) < 2:
+                continue
+
+            keep = max(members, key=lambda c: self.sizes[c])
+            others = [c for c in members if c != keep]
+
+            # an unlabelled survivor takes over a label from the merged ones
+            conn.execute(
+                text("""
+                    UPDATE face_clusters
+                    SET label = COALESCE(label, (
+                        SELECT label FROM face_clusters
+                        WHERE id IN :ids AND label IS NOT NULL
+                        LIMIT 1
+                    ))
+                    WHERE id = :keep
+                """).bindparams(bindparam("ids", expanding=True)),
+                {"keep": keep, "ids": others},
+            )
+            conn.execute(
+                text("""
+                    UPDATE faces
+                    SET cluster_id = :keep,
+                        label = (SELECT label FROM face_clusters WHERE id = :keep)
+                    WHERE cluster_id IN :ids
+                """).bindparams(bindparam("ids", expanding=True)),
+                {"keep": keep, "ids": others},
+            )
+
+            for c in others:
+                self.sums[keep] += self.sums[c]
+                self.sizes[keep] += self.sizes[c]
+                self.sizes[c] = 0
+                self._refresh(c)
+            self._refresh(keep)
+
+            self._write(conn, members)
+            merged += len(others)
+
+        return merged
+
+    def _split(self, conn, embeddings_for):
+        split = 0
+
+        for cluster_id in list(self.sums):
+            size = self.sizes[cluster_id]
+            if size < SPLIT_MIN_SIZE:
+                continue
+
+            # |sum| / n = mean cosine similarity of members to the centroid
+            cohesion = float(np.linalg.norm(self.sums[cluster_id])) / size
+            if cohesion >= SPLIT_COHESION:
+                continue
+
+            face_ids = [
+                r[0] for r in conn.execute(
+                    text("SELECT id FROM faces WHERE cluster_id = :c"),
+                    {"c": cluster_id},
+                ).fetchall()
+            ]
+            embeddings = embeddings_for(face_ids)
+
+            labels = cluster_face_embeddings(
+                list(embeddings.items()), eps=1 - CLUSTER_THRESHOLD
+            )
+
+            parts = {}
+            for face_id, label in labels.items():
+                parts.setdefault(label, []).append(face_id)
+
+            found = sorted(
+                (l for l in parts if l != -1), key=lambda l: -len(parts[l])
+            )
+            if len(found) < 2:
+                continue
+
+            # largest part (and DBSCAN noise) keeps the cluster id
+            touched = [cluster_id]
+            for label in found[1:]:
+                members = parts.pop(label)
+                new_id = self._new_cluster(conn)
+                conn.execute(
+                    text("""
+                        UPDATE face_clusters
+                        SET label = (SELECT label FROM face_clusters WHERE id = :c)
+                        WHERE id = :new
+                    """),
+                    {"c": cluster_id, "new": new_id},
+                )
+
+                conn.execute(
+                    text("UPDATE faces SET cluster_id = :c WHERE id IN :ids")
+                    .bindparams(bindparam("ids", expanding=True)),
+                    {"c": new_id, "ids": members},
+                )
+
+                moved = np.sum([embeddings[f] for f in members], axis=0)
+                self.sums[new_id] = moved.astype("float32")
+                self.sizes[new_id] = len(members)
+                self.sums[cluster_id] -= moved.astype("float32")
+                self.sizes[cluster_id] -= len(members)
+
+                self._refresh(new_id)
+                touched.append(new_id)
+
+            self._refresh(cluster_id)
+            self._write(conn, touched)
+            split += len(touched) - 1
+
+        return split
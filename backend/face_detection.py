@@ -1,14 +1,18 @@
 # face_detection.py
 
 import cv2
-from mtcnn import MTCNN
 from PIL import Image
 import uuid
 import os
+import threading
+import time
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
-# Initialize detector once
-detector = MTCNN()
+# MTCNN (and TensorFlow behind it) is loaded on first use
+detector = None
+load_seconds = None
+_load_lock = threading.Lock()
 
 # Directory to store cropped faces
 
@@ -20,13 +24,36 @@ FACE_DIR.mkdir(parents=True, exist_ok=True)
 
 os.makedirs(FACE_DIR, exist_ok=True)
 
+# crops are only needed on disk for display; write them off the request path
+_crop_writer = ThreadPoolExecutor(max_workers=2, thread_name_prefix="face-crop")
+
+
+def get_detector():
+    global detector, load_seconds
+
+    if detector is None:
+        with _load_lock:
+            if detector is None:
+                print("🙂 Loading face detector...")
+                started = time.perf_counter()
+                from mtcnn import MTCNN
+                detector = MTCNN()
+                load_seconds = round(time.perf_counter() - started, 3)
+
+    return detector
+
+
+def _save_crop(crop, face_path):
+    Image.fromarray(crop).save(face_path)
+
 
 def detect_and_crop_faces(image_path: str):
     """
-    Detects faces in an image and saves cropped face images.
+    Detects faces in an image. Crops are returned in memory (RGB arrays)
+    and written to face_path in the background.
 
     Returns:
-        List of dicts with face_id, face_path, confidence
+        List of dicts with face_id, face_path, confidence, crop, crop_saved
     """
 
     image = cv2.imread(image_path)
@@ -34,7 +61,7 @@ def detect_and_crop_faces(image_path: str):
         raise ValueError(f"❌ Could not read image: {image_path}")
 
     rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    results = detector.detect_faces(rgb)
+    results = get_detector().detect_faces(rgb)
 
     faces = []
 
@@ -50,12 +77,13 @@ def detect_and_crop_faces(image_path: str):
         face_id = str(uuid.uuid4())
         face_path = os.path.join(FACE_DIR, f"{face_id}.jpg")
 
-        Image.fromarray(crop).save(face_path)
-
         faces.append({
             "face_id": face_id,
             "face_path": face_path,
-            "confidence": float(r["confidence"])
+            "confidence": float(r["confidence"]),
+            "crop": crop,
+            # future; .result() waits for the JPEG to be on disk
+            "crop_saved": _crop_writer.submit(_save_crop, crop, face_path),
         })
 
     return faces
@@ -1,14 +1,137 @@
 # face_embedding.py
 
-import torch
+import os
+import threading
+import time
+
 import numpy as np
 from PIL import Image
-from facenet_pytorch import InceptionResnetV1
 
-# Load FaceNet model (CPU only)
-model = InceptionResnetV1(
-    pretrained="vggface2"
-).eval()
+# eager  = facenet_pytorch module as is
+# traced = TorchScript trace, frozen (BatchNorm folded into the convs)
+# int8   = traced + dynamic int8 quantization of the Linear layers
+FACE_ENGINE = os.getenv("FACE_ENGINE", "traced")
+# intra-op threads for FaceNet (0 = leave torch as it is). Set once when
+# the model loads. torch has a single intra-op pool per process, shared
+# with the torch text embedder (EMBEDDING_THREADS): with two different
+# values the model loaded last wins, so in the API process set at most
+# one. Import workers are separate processes and get their own share.
+FACE_THREADS = int(os.getenv("FACE_THREADS", "0"))
+# crops per forward pass (bounds memory on bulk imports)
+FACE_BATCH_SIZE = int(os.getenv("FACE_BATCH_SIZE", "32"))
+
+# FaceNet (and torch) is loaded on first use (CPU only)
+model = None
+load_seconds = None
+_load_lock = threading.Lock()
+
+
+FACE_SIZE = (160, 160)  # FaceNet input size
+
+
+def load_model(engine: str = FACE_ENGINE):
+    import torch
+    from facenet_pytorch import InceptionResnetV1
+
+    net = InceptionResnetV1(pretrained="vggface2").eval()
+
+    if engine == "eager":
+        return net.to(memory_format=torch.channels_last)
+
+    if engine not in ("traced", "int8"):
+        raise ValueError(f"Unknown FACE_ENGINE: {engine}")
+
+    if engine == "int8":
+        net = torch.quantization.quantize_dynamic(net, {torch.nn.Linear}, dtype=torch.qint8)
+
+    net = net.to(memory_format=torch.channels_last)
+    example = torch.zeros(2, 3, *FACE_SIZE).contiguous(memory_format=torch.channels_last)
+
+    with torch.no_grad():
+        traced = torch.jit.trace(net, example)
+        traced = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+        # first calls of a frozen graph run the optimizer passes
+        traced(example)
+        traced(example)
+
+    return traced
+
+
+def get_model():
+    global model, load_seconds
+
+    if model is None:
+        with _load_lock:
+            if model is None:
+                import torch
+
+                print(f"🧠 Loading FaceNet model ({FACE_ENGINE})...")
+                started = time.perf_counter()
+                # process-wide, see FACE_THREADS
+                if FACE_THREADS:
+                    torch.set_num_threads(FACE_THREADS)
+                try:
+                    model = load_model()
+                except Exception as e:
+                    if FACE_ENGINE == "eager":
+                        raise
+                    print(f"⚠️ FaceNet {FACE_ENGINE} engine failed ({e}), using eager")
+                    model = load_model("eager")
+                load_seconds = round(time.perf_counter() - started, 3)
+
+    return model
+
+
+def _preprocess(crop):
+    import torch
+
+    img = Image.fromarray(np.asarray(crop)).convert("RGB").resize(FACE_SIZE)
+    img_np = np.asarray(img).astype("float32") / 255.0
+    return torch.from_numpy(img_np).permute(2, 0, 1)
+
+
+def get_face_embeddings(crops):
+    """
+    Embed many face crops (RGB arrays, any size), FACE_BATCH_SIZE per
+    forward pass.
+
+    Returns:
+        list with a 512-D normalized float32 embedding per crop,
+        or None where a crop cannot be processed
+    """
+    import torch
+
+    model = get_model()
+    tensors, valid = [], []
+
+    for i, crop in enumerate(crops):
+        try:
+            tensors.append(_preprocess(crop))
+            valid.append(i)
+        except Exception:
+            continue
+
+    results = [None] * len(crops)
+    if not tensors:
+        return results
+
+    batches = []
+    with torch.no_grad():
+        for start in range(0, len(tensors), FACE_BATCH_SIZE):
+            batch = torch.stack(tensors[start:start + FACE_BATCH_SIZE])
+            batch = batch.contiguous(memory_format=torch.channels_last)
+            batches.append(model(batch).cpu().numpy())
+
+    embeddings = np.concatenate(batches)
+
+    for i, emb in zip(valid, embeddings):
+        # L2 normalize (CRITICAL for cosine similarity)
+        norm = np.linalg.norm(emb)
+        if norm == 0:
+            continue
+        results[i] = (emb / norm).astype("float32")
+
+    return results
 
 
 def get_face_embedding(face_image_path: str):
@@ -28,21 +151,4 @@ def get_face_embedding(face_image_path: str):
     except Exception:
         return None
 
-    # FaceNet input size
-    img = img.resize((160, 160))
-
-    img_np = np.asarray(img).astype("float32") / 255.0
-    img_tensor = torch.from_numpy(img_np).permute(2, 0, 1).unsqueeze(0)
-
-    with torch.no_grad():
-        embedding = model(img_tensor)
-
-    emb = embedding.cpu().numpy()[0]
-
-    # L2 normalize (CRITICAL for cosine similarity)
-    norm = np.linalg.norm(emb)
-    if norm == 0:
-        return None
-
-    emb = emb / norm
-    return emb.astype("float32")
+    return get_face_embeddings([np.asarray(img)])[0]
@@ -0,0 +1,101 @@
+# face_executor.py
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+FACE_WORKERS = int(os.getenv("FACE_WORKERS", "1"))
+FACE_QUEUE_SIZE = int(os.getenv("FACE_QUEUE_SIZE", "4"))
+FACE_RETRY_AFTER = int(os.getenv("FACE_RETRY_AFTER", "5"))  # seconds
+
+
+class FaceQueueFull(Exception):
+    pass
+
+
+class FaceExecutor:
+    """
+    Runs face inference (MTCNN / FaceNet, sync SQL) on dedicated threads so
+    the asyncio event loop stays free.
+
+    At most workers + queue_size jobs are admitted at once; beyond that
+    run() raises FaceQueueFull instead of piling work up.
+    """
+
+    def __init__(
+        self,
+        workers: int = FACE_WORKERS,
+        queue_size: int = FACE_QUEUE_SIZE,
+        retry_after: int = FACE_RETRY_AFTER,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.retry_after = retry_after
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="face",
+        )
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self._wait_ms_total = 0.0
+        self._run_ms_total = 0.0
+
+    async def run(self, fn, *args):
+        """
+        Returns:
+            (fn result, {"queue_wait_ms": ..., "inference_ms": ...})
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise FaceQueueFull()
+
+        with self._lock:
+            self.in_flight += 1
+
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            try:
+                return fn(*args), started, time.perf_counter()
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                self._slots.release()
+
+        result, started, finished = await asyncio.wrap_future(
+            self._executor.submit(task)
+        )
+
+        timings = {
+            "queue_wait_ms": round((started - submitted) * 1000, 1),
+            "inference_ms": round((finished - started) * 1000, 1),
+        }
+
+        with self._lock:
+            self.completed += 1
+            self._wait_ms_total += timings["queue_wait_ms"]
+            self._run_ms_total += timings["inference_ms"]
+
+        return result, timings
+
+    def stats(self) -> dict:
+        with self._lock:
+            done = self.completed
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": self.in_flight,
+                "completed": done,
+                "rejected": self.rejected,
+                "avg_queue_wait_ms": round(self._wait_ms_total / done, 1) if done else None,
+                "avg_inference_ms": round(self._run_ms_total / done, 1) if done else None,
+            }
@@ -0,0 +1,385 @@
+# face_import.py
+#
+# Bulk photo library import:
+#   python face_import.py <folder-or-zip> [--workers N] [--resume IMPORT_ID]
+#
+# Run the CLI while the backend is stopped (both would write the face
+# index); from a running backend use POST /face/import instead.
+
+import argparse
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from sqlalchemy import text
+
+from db import engine
+
+APP_DATA = Path(os.getenv("APPDATA", Path.home()))
+BASE_DIR = APP_DATA / "AI_Memory_Assistant"
+PHOTO_DIR = BASE_DIR / "storage" / "photos"
+UNLABELED_DIR = PHOTO_DIR / "unlabelled"
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+IMPORT_WORKERS = int(os.getenv("FACE_IMPORT_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+# photos per transaction + index save; an interrupted import resumes
+# from the last checkpoint
+CHECKPOINT_PHOTOS = int(os.getenv("FACE_IMPORT_CHECKPOINT", "500"))
+
+
+class IndexHandle:
+    """
+    How the importer reaches the live face index: get() / set(index),
+    with lock held around every read-modify-write. clusters is the
+    OnlineFaceClusters instance new faces are assigned to, labels the
+    LabelPropagation their labels come from.
+    """
+
+    def __init__(self, get, set, lock, clusters, labels):
+        self.get = get
+        self.set = set
+        self.lock = lock
+        self.clusters = clusters
+        self.labels = labels
+
+
+# =========================================================
+# SOURCE ENUMERATION
+# =========================================================
+
+def list_photos(source: str) -> list:
+    """
+    Relative names of every image in a folder (recursive) or zip archive.
+    """
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            names = [n for n in zf.namelist() if n.lower().endswith(IMAGE_EXTENSIONS)]
+    else:
+        root = Path(source)
+        names = [
+            str(p.relative_to(root))
+            for p in root.rglob("*")
+            if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS
+        ]
+
+    return sorted(names)
+
+
+def _read_photo(source: str, item: str) -> bytes:
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as zf:
+            return zf.read(item)
+    return (Path(source) / item).read_bytes()
+
+
+# =========================================================
+# WORKER PROCESS (detection + embedding)
+# =========================================================
+
+def _init_worker(face_threads: int):
+    # load MTCNN + FaceNet once per process
+    import face_embedding
+    from face_detection import get_detector
+    from face_embedding import get_model
+
+    # the cores are split between the worker processes
+    face_embedding.FACE_THREADS = face_threads
+
+    # pooled connections inherited from the parent must not be shared;
+    # close=False leaves them to the parent, this process opens its own
+    engine.dispose(close=False)
+
+    get_detector()
+    get_model()
+
+
+def _process_photo(source: str, item: str) -> dict:
+    from face_detection import detect_and_crop_faces
+    from face_embedding import get_face_embeddings
+
+    data = _read_photo(source, item)
+    content_hash = hashlib.sha256(data).hexdigest()
+
+    with engine.connect() as conn:
+        seen = conn.execute(
+            text("SELECT 1 FROM faces WHERE content_hash = :h LIMIT 1"),
+            {"h": content_hash},
+        ).fetchone()
+
+    if seen:
+        return {"item": item, "status": "duplicate", "faces": []}
+
+    # content-addressed name: identical photos never collide
+    name = Path(item).name
+    image_path = UNLABELED_DIR / f"{Path(name).stem}_{content_hash[:10]}{Path(name).suffix}"
+    if not image_path.exists():
+        image_path.write_bytes(data)
+
+    faces = detect_and_crop_faces(str(image_path))
+    embeddings = get_face_embeddings([f["crop"] for f in faces])
+
+    result_faces = []
+    for face, emb in zip(faces, embeddings):
+        face["crop_saved"].result()
+        if emb is not None:
+            result_faces.append((face["face_id"], emb))
+
+    return {
+        "item": item,
+        "status": "done" if result_faces else "no_face",
+        "image_path": str(image_path),
+        "content_hash": content_hash,
+        "faces": result_faces,
+    }
+
+
+# =========================================================
+# PROGRESS
+# =========================================================
+
+def _create_import(source: str, total: int) -> str:
+    import_id = str(uuid.uuid4())
+    with engine.begin() as conn:
+        conn.execute(
+            text("""
+                INSERT INTO face_imports (id, source, status, total)
+                VALUES (:id, :s, 'running', :t)
+            """),
+            {"id": import_id, "s": source, "t": total},
+        )
+    return import_id
+
+
+def _finished_items(import_id: str) -> set:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT item FROM face_import_items WHERE import_id = :id"),
+            {"id": import_id},
+        ).fetchall()
+    return {r[0] for r in rows}
+
+
+def get_import(import_id: str):
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT * FROM face_imports WHERE id = :id"),
+            {"id": import_id},
+        ).fetchone()
+    return dict(row._mapping) if row else None
+
+
+def _set_status(import_id: str, status: str, error: str = None):
+    with engine.begin() as conn:
+        conn.execute(
+            text("""
+                UPDATE face_imports
+                SET status = :s, error = :e, updated_at = CURRENT_TIMESTAMP
+                WHERE id = :id
+            """),
+            {"s": status, "e": error, "id": import_id},
+        )
+
+
+# =========================================================
+# CHECKPOINT (batched SQL + single index save)
+# =========================================================
+
+def _checkpoint(import_id: str, results: list, handle: IndexHandle):
+    """
+    Index a batch of processed photos and persist the index, then insert
+    their faces and mark them finished in one transaction. A crash before
+    that commit leaves at most vectors without a faces row, and the photos
+    are redone on resume; a photo is never marked finished with its faces
+    missing from the index.
+    """
+    from face_index import (
+        ensure_writable,
+        add_face_embeddings,
+        save_index,
+        face_embeddings_for,
+    )
+
+    faces = [
+        (r, face_id, emb)
+        for r in results
+        for face_id, emb in r["faces"]
+    ]
+
+    with handle.lock:
+        index = ensure_writable(handle.get())
+
+        add_face_embeddings(index, [(face_id, emb) for _, face_id, emb in faces])
+        save_index(index)
+        handle.set(index)
+
+        labels = {}
+
+        with engine.begin() as conn:
+            if faces:
+                cluster_ids = handle.clusters.assign(conn, [emb for _, _, emb in faces])
+
+                # one lookup for the labels of every cluster touched
+                cluster_labels = handle.labels.get_labels(cluster_ids, conn)
+                labels = {
+                    face_id: cluster_labels.get(cluster_id)
+                    for (_, face_id, _), cluster_id in zip(faces, cluster_ids)
+                }
+
+                conn.execute(
+                    text("""
+                        INSERT INTO faces (id, image_path, label, content_hash, cluster_id)
+                        VALUES (:id, :path, :label, :h, :c)
+                    """),
+                    [
+                        {
+                            "id": face_id,
+                            "path": r["image_path"],
+                            "label": labels.get(face_id),
+                            "h": r["content_hash"],
+                            "c": cluster_id,
+                        }
+                        for (r, face_id, _), cluster_id in zip(faces, cluster_ids)
+                    ],
+                )
+
+            conn.execute(
+                text("""
+                    INSERT OR REPLACE INTO face_import_items (import_id, item, status)
+                    VALUES (:id, :item, :s)
+                """),
+                [{"id": import_id, "item": r["item"], "s": r["status"]} for r in results],
+            )
+            conn.execute(
+                text("""
+                    UPDATE face_imports
+                    SET done = done + :n, faces = faces + :f, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = :id
+                """),
+                {"n": len(results), "f": len(faces), "id": import_id},
+            )
+
+        if handle.clusters.maintenance_due():
+            with engine.begin() as conn:
+                handle.clusters.maintain(
+                    conn, lambda ids: face_embeddings_for(index, ids)
+                )
+
+    # labelled matches go to their label folder, like /face/upload
+    for r, face_id, _ in faces:
+        label = labels.get(face_id)
+        if label:
+            label_folder = PHOTO_DIR / label.lower()
+            label_folder.mkdir(parents=True, exist_ok=True)
+            new_path = label_folder / Path(r["image_path"]).name
+            if not new_path.exists():
+                shutil.copy2(r["image_path"], new_path)
+
+
+# =========================================================
+# ENTRY POINT
+# =========================================================
+
+def run_import(
+    source: str,
+    handle: IndexHandle,
+    import_id: str = None,
+    workers: int = IMPORT_WORKERS,
+    progress=print,
+) -> str:
+    """
+    Import every photo under `source` (folder or zip). Pass the id of an
+    earlier import to resume it; finished photos are skipped.
+    """
+    items = list_photos(source)
+    UNLABELED_DIR.mkdir(parents=True, exist_ok=True)
+
+    if import_id is None:
+        import_id = _create_import(source, len(items))
+    else:
+        _set_status(import_id, "running")
+
+    todo = [i for i in items if i not in _finished_items(import_id)]
+    progress(f"📥 Import {import_id}: {len(todo)} of {len(items)} photos to process")
+
+    pending = []
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(max(1, (os.cpu_count() or 1) // workers),),
+        ) as pool:
+            futures = [pool.submit(_process_photo, source, item) for item in todo]
+
+            for n, future in enumerate(as_completed(futures), 1):
+                try:
+                    pending.append(future.result())
+                except Exception as e:
+                    progress(f"⚠️ Failed photo: {e}")
+
+                if len(pending) >= CHECKPOINT_PHOTOS:
+                    _checkpoint(import_id, pending, handle)
+                    pending = []
+                    progress(f"   {n}/{len(todo)} photos")
+
+        _checkpoint(import_id, pending, handle)
+    except Exception as e:
+        _set_status(import_id, "failed", str(e))
+        raise
+
+    _set_status(import_id, "done")
+    progress(f"✅ Import {import_id} finished")
+    return import_id
+
+
+def start_import(source: str, handle: IndexHandle, import_id: str = None) -> str:
+    """
+    Run an import on a background thread; returns its id right away.
+    """
+    if import_id is None:
+        import_id = _create_import(source, len(list_photos(source)))
+
+    threading.Thread(
+        target=run_import,
+        args=(source, handle, import_id),
+        daemon=True,
+        name=f"face-import-{import_id[:8]}",
+    ).start()
+
+    return import_id
+
+
+if __name__ == "__main__":
+    from init_db import init_db
+    from face_index import load_index
+    from face_clustering import OnlineFaceClusters
+    from label_propagation import LabelPropagation
+
+    parser = argparse.ArgumentParser(description="Bulk import a photo library")
+    parser.add_argument("source", help="folder or .zip with photos")
+    parser.add_argument("--workers", type=int, default=IMPORT_WORKERS)
+    parser.add_argument("--resume", help="import id to resume")
+    args = parser.parse_args()
+
+    init_db()
+
+    state = {"index": load_index()}
+    clusters = OnlineFaceClusters()
+    with engine.connect() as conn:
+        clusters.load(conn)
+
+    handle = IndexHandle(
+        get=lambda: state["index"],
+        set=lambda idx: state.update(index=idx),
+        lock=threading.Lock(),
+        clusters=clusters,
+        labels=LabelPropagation(),
+    )
+
+    run_import(args.source, handle, import_id=args.resume, workers=args.workers)
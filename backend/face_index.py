@@ -4,6 +4,10 @@ import faiss
 import numpy as np
 import os
 import pickle
+from sqlalchemy import text, bindparam
+
+import index_io
+from db import engine
 
 EMBEDDING_DIM = 512
 from pathlib import Path
@@ -13,53 +17,203 @@ BASE_DIR = APP_DATA / "AI_Memory_Assistant"
 STORAGE_DIR = BASE_DIR / "storage"
 
 INDEX_PATH = str(STORAGE_DIR / "face_faiss.index")
+# legacy positional id lists (migrated into face_index_ids on first load)
+IDS_PATH = str(STORAGE_DIR / "face_faiss_ids.npy")
 META_PATH = str(STORAGE_DIR / "face_faiss_meta.pkl")
 
+_mmapped = False
 
-# In-memory mappings
-face_ids = []  # index -> face_id
 
 def create_index():
-    return faiss.IndexFlatIP(EMBEDDING_DIM)
+    # vectors are keyed by face_index_ids.vec_id (stable int per face UUID)
+    return faiss.IndexIDMap2(faiss.IndexFlatIP(EMBEDDING_DIM))
 
 
-def load_index():
-    if os.path.exists(INDEX_PATH) and os.path.exists(META_PATH):
-        index = faiss.read_index(INDEX_PATH)
+# ---- id <-> face UUID mapping (SQLite) ----
+
+def _assign_vec_ids(conn, face_ids) -> list:
+    conn.execute(
+        text("INSERT OR IGNORE INTO face_index_ids (face_id) VALUES (:f)"),
+        [{"f": f} for f in face_ids],
+    )
+    rows = conn.execute(
+        text("SELECT face_id, vec_id FROM face_index_ids WHERE face_id IN :ids")
+        .bindparams(bindparam("ids", expanding=True)),
+        {"ids": list(face_ids)},
+    ).fetchall()
+
+    vec_ids = dict(rows)
+    return [vec_ids[f] for f in face_ids]
+
+
+def _face_ids_for(vec_ids) -> dict:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT vec_id, face_id FROM face_index_ids WHERE vec_id IN :ids")
+            .bindparams(bindparam("ids", expanding=True)),
+            {"ids": [int(v) for v in vec_ids]},
+        ).fetchall()
+    return dict(rows)
+
+
+def _migrate_positional(legacy):
+    """
+    Old files: plain IndexFlatIP + face_ids list in index order.
+    """
+    if os.path.exists(IDS_PATH):
+        face_ids = np.load(IDS_PATH).tolist()
+    else:
         with open(META_PATH, "rb") as f:
-            global face_ids
             face_ids = pickle.load(f)
-        return index
-    else:
+
+    print(f"♻️ Migrating {len(face_ids)} face vectors to id-mapped index...")
+
+    index = create_index()
+    if face_ids:
+        with engine.begin() as conn:
+            vec_ids = _assign_vec_ids(conn, face_ids)
+        vectors = legacy.reconstruct_n(0, legacy.ntotal)
+        index.add_with_ids(vectors, np.array(vec_ids, dtype="int64"))
+
+    save_index(index)
+    return index
+
+
+def load_index():
+    global _mmapped
+
+    if not os.path.exists(INDEX_PATH):
         return create_index()
 
+    index, _mmapped = index_io.read_index(INDEX_PATH)
+
+    if not hasattr(index, "id_map"):
+        index, _ = index_io.read_index(INDEX_PATH, mmap=False)
+        _mmapped = False
+        return _migrate_positional(index)
+
+    return index
+
+
+def ensure_writable(index):
+    """
+    Returns a writable index: the mmapped one is swapped for a heap copy
+    before the first add / remove.
+    """
+    global _mmapped
+
+    if not _mmapped:
+        return index
+
+    index, _ = index_io.read_index(INDEX_PATH, mmap=False)
+    _mmapped = False
+    return index
+
 
 def save_index(index):
-    faiss.write_index(index, INDEX_PATH)
-    with open(META_PATH, "wb") as f:
-        pickle.dump(face_ids, f)
+    index_io.write_index(index, INDEX_PATH)
+
+
+def add_face_embeddings(index, faces):
+    """
+    faces: list of (face_id, embedding); embeddings (512,) L2-normalized
+
+    index must come from ensure_writable()
+    """
+    if not faces:
+        return
+
+    with engine.begin() as conn:
+        vec_ids = _assign_vec_ids(conn, [f for f, _ in faces])
+
+    vectors = np.vstack([e.reshape(1, -1) for _, e in faces]).astype("float32")
+    index.add_with_ids(vectors, np.array(vec_ids, dtype="int64"))
 
 
 def add_face_embedding(index, face_id: str, embedding: np.ndarray):
     """
     embedding must be shape (512,) and L2-normalized
+
+    index must come from ensure_writable()
+    """
+    add_face_embeddings(index, [(face_id, embedding)])
+
+
+def remove_faces(index, face_ids):
+    """
+    Drop faces from the index (and their id mapping).
+
+    index must come from ensure_writable()
+    """
+    if not face_ids:
+        return
+
+    with engine.begin() as conn:
+        vec_ids = [
+            r[0] for r in conn.execute(
+                text("SELECT vec_id FROM face_index_ids WHERE face_id IN :ids")
+                .bindparams(bindparam("ids", expanding=True)),
+                {"ids": list(face_ids)},
+            ).fetchall()
+        ]
+
+        conn.execute(
+            text("DELETE FROM face_index_ids WHERE face_id IN :ids")
+            .bindparams(bindparam("ids", expanding=True)),
+            {"ids": list(face_ids)},
+        )
+
+    if vec_ids:
+        index.remove_ids(np.array(vec_ids, dtype="int64"))
+
+
+def face_embeddings_for(index, face_ids) -> dict:
     """
-    embedding = embedding.reshape(1, -1).astype("float32")
-    index.add(embedding)
-    face_ids.append(face_id)
+    Stored embeddings of the given faces.
+
+    Returns:
+        face_id -> embedding (512,)
+    """
+    if not face_ids:
+        return {}
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT face_id, vec_id FROM face_index_ids WHERE face_id IN :ids")
+            .bindparams(bindparam("ids", expanding=True)),
+            {"ids": list(face_ids)},
+        ).fetchall()
+
+    embeddings = {}
+    for face_id, vec_id in rows:
+        try:
+            embeddings[face_id] = index.reconstruct(int(vec_id))
+        except RuntimeError:   # mapped but never added
+            continue
+
+    return embeddings
 
 
 def search_similar_faces(index, query_embedding, top_k=5):
+    if index.ntotal == 0:
+        return []
+
     query_embedding = query_embedding.reshape(1, -1).astype("float32")
     scores, indices = index.search(query_embedding, top_k)
 
+    hits = [(int(i), float(s)) for s, i in zip(scores[0], indices[0]) if i != -1]
+    if not hits:
+        return []
+
+    face_ids = _face_ids_for([i for i, _ in hits])
+
     results = []
-    for score, idx in zip(scores[0], indices[0]):
-        if idx == -1:
+    for vec_id, score in hits:
+        if vec_id not in face_ids:
             continue
         results.append({
-            "face_id": face_ids[idx],
-            "similarity": float(score)
+            "face_id": face_ids[vec_id],
+            "similarity": score
         })
 
     return results
@@ -1,7 +1,11 @@
 import faiss
 import numpy as np
-from ai import get_embedding
-from sqlalchemy import text
+import threading
+import time
+from ai import MODEL_NAME, MODEL_KEY, get_embedding, get_embeddings
+import embedding_store
+import index_io
+from sqlalchemy import text, bindparam
 from db import STORAGE_DIR, engine
 from pathlib import Path
 import os
@@ -10,65 +14,740 @@ APP_DATA = Path(os.getenv("APPDATA", Path.home()))
 BASE_DIR = APP_DATA / "AI_Memory_Assistant"
 STORAGE_DIR = BASE_DIR / "storage"
 FAISS_FILE = STORAGE_DIR / "faiss.index"
+# ids of the old positional index; the ids now live in the index itself
 IDMAP_FILE = STORAGE_DIR / "faiss_ids.npy"
+# embedding model / backend the stored vectors came from
+MODEL_FILE = STORAGE_DIR / "faiss_model.txt"
+# HNSW: deleted ids still in the graph, skipped at search time
+TOMBSTONE_FILE = STORAGE_DIR / "faiss_tombstones.npy"
 
 DIMENSION = 384  # embedding size (very important)
+BUILD_BATCH_SIZE = 256  # rows streamed from SQLite per encode batch
 
-index = faiss.IndexFlatL2(DIMENSION)
-id_map = []  # maps FAISS index -> memory_id
+# "auto" | "flat" | "ivf" | "hnsw"
+INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "auto").lower()
+# auto mode: brute force below this many vectors, IVF above
+ANN_THRESHOLD = int(os.getenv("FAISS_ANN_THRESHOLD", "200000"))
+
+IVF_NLIST = int(os.getenv("FAISS_IVF_NLIST", "0"))  # 0 = 4 * sqrt(n)
+IVF_NPROBE = int(os.getenv("FAISS_IVF_NPROBE", "16"))
+IVF_MIN_TRAIN = 1000  # fewer vectors than this stay flat (k-means needs points)
+HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+# compact the HNSW graph (in the background) once this share of it is deleted
+HNSW_COMPACT_FRACTION = float(os.getenv("FAISS_HNSW_COMPACT_FRACTION", "0.1"))
+TRAIN_SAMPLE_SIZE = int(os.getenv("FAISS_TRAIN_SAMPLE", "50000"))
+
+# how vectors are stored in RAM: "fp32" | "fp16" | "int8" | "pq"
+INDEX_CODEC = os.getenv("FAISS_INDEX_CODEC", "fp32").lower()
+PQ_M = int(os.getenv("FAISS_PQ_M", "48"))  # sub-quantizers, bytes per vector
+# PQ codebooks have 256 centroids each; k-means wants ~39 points per centroid
+PQ_MIN_TRAIN = 256 * 39
+SQ_MIN_TRAIN = 1000  # int8 ranges learnt from fewer points clip later data
+# compressed codecs: re-score this many candidates with exact vectors (0 = off)
+RERANK_K = int(os.getenv("FAISS_RERANK_K", "32"))
+
+_SQ_TYPES = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+
+def _index_kind(n: int) -> str:
+    if INDEX_TYPE != "auto":
+        kind = INDEX_TYPE
+    else:
+        kind = "ivf" if n >= ANN_THRESHOLD else "flat"
+
+    if kind == "ivf" and n < IVF_MIN_TRAIN:
+        # nothing (or too little) to train the coarse quantizer on yet;
+        # add_memories switches to IVF once the corpus is big enough
+        return "flat"
+    return kind
+
+
+_CODEC_RANK = {"fp32": 0, "fp16": 1, "int8": 1, "pq": 2}
+
+
+def _index_codec(kind: str, n: int) -> str:
+    codec = INDEX_CODEC
+    if codec == "pq" and (kind == "hnsw" or n < PQ_MIN_TRAIN):
+        # too few points to train PQ (HNSW+PQ is not offered) -> closest SQ
+        codec = "int8"
+    if codec == "int8" and n < SQ_MIN_TRAIN:
+        # nothing (or too little) to train on yet: full precision until
+        # add_memories retrains once the corpus is big enough
+        codec = "fp32"
+    return codec
+
+
+def _needs_upgrade(idx) -> bool:
+    """
+    True when idx is a stand-in picked for a small corpus (flat instead of
+    IVF, a weaker codec than configured) and it has since grown past the
+    training threshold.
+    """
+    n = idx.ntotal
+    kind = _kind_of(idx)
+    if kind == "flat" and _index_kind(n) != "flat":
+        return True
+    return _CODEC_RANK[_index_codec(kind, n)] > _CODEC_RANK[_codec_of(idx)]
+
+
+def _index_description(kind: str, n: int) -> str:
+    codec = {
+        "fp32": "Flat",
+        "fp16": "SQfp16",
+        "int8": "SQ8",
+        "pq": f"PQ{PQ_M}",
+    }[_index_codec(kind, n)]
+
+    if kind == "ivf":
+        nlist = IVF_NLIST or int(4 * np.sqrt(n))
+        # k-means wants ~39 training points per list
+        nlist = max(1, min(nlist, min(n, TRAIN_SAMPLE_SIZE) // 39))
+        return f"IVF{nlist},{codec}"
+    if kind == "hnsw":
+        return f"HNSW{HNSW_M}"
+    return codec
+
+
+def _unwrapped(idx):
+    # flat / HNSW sit inside an IDMap2; IVF keeps ids in its inverted lists
+    if isinstance(idx, faiss.IndexIDMap2):
+        return faiss.downcast_index(idx.index)
+    return faiss.downcast_index(idx)
+
+
+def _kind_of(idx) -> str:
+    inner = _unwrapped(idx)
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivf"
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
+def _keyed_by_id(idx) -> bool:
+    # older files wrapped IVF in an IDMap2, whose remove_ids renumbers
+    # positions the inverted lists still point at
+    if isinstance(idx, faiss.IndexIDMap2):
+        return _kind_of(idx) != "ivf"
+    return isinstance(idx, faiss.IndexIVF)
+
+
+def _codec_of(idx) -> str:
+    inner = _unwrapped(idx)
+    if isinstance(inner, faiss.IndexHNSW):
+        inner = faiss.downcast_index(inner.storage)
+
+    if isinstance(inner, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        return "pq"
+    if isinstance(inner, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        return "fp16" if inner.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "int8"
+    return "fp32"
+
+
+def _bytes_per_vector(idx) -> dict:
+    """
+    RAM per stored vector: the code itself plus id / graph overhead.
+    """
+    inner = _unwrapped(idx)
+    overhead = 8  # IDMap2 id, or id stored in the inverted list
+
+    if isinstance(inner, faiss.IndexHNSW):
+        code = faiss.downcast_index(inner.storage).code_size
+        overhead += 2 * HNSW_M * 4  # level-0 neighbour links
+    else:
+        code = inner.code_size
+
+    return {
+        "code_bytes": int(code),
+        "approx_bytes_per_vector": int(code + overhead),
+        "fp32_bytes_per_vector": DIMENSION * 4,
+    }
+
+
+def _apply_search_params(idx):
+    # defaults, set once on an index before it is published
+    inner = _unwrapped(idx)
+    if isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = IVF_NPROBE
+    elif isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = HNSW_EF_SEARCH
+
+
+def _search_params(idx, nprobe=None, ef_search=None):
+    # per-call overrides; the shared index is left untouched
+    kind = _kind_of(idx)
+    if kind == "ivf":
+        return faiss.SearchParametersIVF(nprobe=nprobe or IVF_NPROBE)
+    if kind == "hnsw":
+        params = faiss.SearchParametersHNSW(efSearch=ef_search or HNSW_EF_SEARCH)
+        if _tombstone_selector is not None:
+            params.sel = _tombstone_selector[1]
+        return params
+    return None
+
+
+def _new_index(kind: str = "flat", n: int = 0):
+    # vectors are keyed by memories.id, so rows can be added / removed in place.
+    # vectors are L2-normalized, so inner product == cosine similarity
+    codec = _index_codec(kind, n)
+
+    if kind == "hnsw" and codec != "fp32":
+        idx = faiss.IndexIDMap2(faiss.IndexHNSWSQ(
+            DIMENSION, _SQ_TYPES[codec], HNSW_M, faiss.METRIC_INNER_PRODUCT
+        ))
+    elif kind == "ivf":
+        # IVF takes add_with_ids / remove_ids natively (ids in the lists)
+        idx = faiss.index_factory(
+            DIMENSION, _index_description(kind, n), faiss.METRIC_INNER_PRODUCT
+        )
+    else:
+        idx = faiss.index_factory(
+            DIMENSION,
+            "IDMap2," + _index_description(kind, n),
+            faiss.METRIC_INNER_PRODUCT,
+        )
+
+    _apply_search_params(idx)
+    return idx
+
+
+index = _new_index()
+# endpoints run in a threadpool; re-entrant so a write can trigger a rebuild.
+# Searches take it too: add / remove change the index in place (remove_ids
+# compacts its storage) and ingest workers write while queries run.
+_lock = threading.RLock()
+
+# the index loaded at startup is memory-mapped read-only until the first write
+_mmapped = False
+
+# HNSW graphs cannot drop nodes: removed ids are filtered out at search time
+# until the graph is compacted. Guarded by _lock.
+_tombstones = set()
+_tombstone_selector = None  # (IDSelectorBatch, IDSelectorNot over it)
+_compacting = False
+
+# bumped on every change to the index; cached search results
+# from an older generation are stale
+generation = 0
+
+
+def _bump_generation():
+    global generation
+    generation += 1
+
+
+def _normalized(vectors):
+    vectors = np.ascontiguousarray(vectors, dtype="float32").reshape(-1, DIMENSION)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def _embed(contents):
+    return _normalized(get_embeddings(contents, batch_size=BUILD_BATCH_SIZE))
+
+
+def _train(idx, n: int):
+    """
+    Train coarse quantizers (IVF) and codecs (SQ / PQ) on a random sample
+    of stored memories.
+    """
+    if idx.is_trained:
+        return
+
+    sample_size = min(n, TRAIN_SAMPLE_SIZE)
+    print(f"🎯 Training FAISS on {sample_size} sampled vectors...")
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT content FROM memories ORDER BY RANDOM() LIMIT :n"),
+            {"n": sample_size},
+        ).fetchall()
+
+    idx.train(_embed([r[0] for r in rows]))
+
+
+def _set_tombstones(ids):
+    global _tombstones, _tombstone_selector
+
+    _tombstones = set(ids)
+    if not _tombstones:
+        _tombstone_selector = None
+        return
+
+    # the Not selector only points at the batch one, keep both alive
+    batch = faiss.IDSelectorBatch(
+        np.fromiter(_tombstones, dtype="int64", count=len(_tombstones))
+    )
+    _tombstone_selector = (batch, faiss.IDSelectorNot(batch))
+
+
+def _hnsw_from(vectors, ids):
+    # from decoded stored vectors: no re-encoding, SQ trained on them
+    rebuilt = _new_index("hnsw", len(ids))
+    if not rebuilt.is_trained:
+        rebuilt.train(vectors)
+    if len(ids):
+        rebuilt.add_with_ids(vectors, ids)
+    return rebuilt
+
+
+def _remove_ids(idx, ids, reused: bool = False):
+    """
+    Flat and IVF indexes drop ids in place. HNSW graphs cannot drop nodes:
+    removed ids become tombstones, skipped at search time, and the graph
+    is compacted in the background once they pile up (_maybe_compact).
+    Ids that are about to be added again (reused) cannot be tombstoned;
+    for those the graph is rebuilt right away.
+    """
+    ids = np.asarray(ids, dtype="int64")
+
+    if _kind_of(idx) != "hnsw":
+        idx.remove_ids(ids)
+        return idx
+
+    stored_ids = faiss.vector_to_array(idx.id_map)
+    present = np.isin(stored_ids, ids)
+    if not present.any():
+        return idx
+
+    if not reused:
+        _set_tombstones(_tombstones | set(stored_ids[present].tolist()))
+        return idx
+
+    keep = ~present & ~np.isin(stored_ids, list(_tombstones))
+    rebuilt = _hnsw_from(idx.index.reconstruct_n(0, idx.ntotal)[keep], stored_ids[keep])
+    _set_tombstones(())
+    return rebuilt
+
+
+def _maybe_compact():
+    # caller holds _lock
+    global _compacting
+
+    if (
+        _compacting
+        or _kind_of(index) != "hnsw"
+        or len(_tombstones) <= HNSW_COMPACT_FRACTION * index.ntotal
+    ):
+        return
+
+    _compacting = True
+    threading.Thread(target=_compact, daemon=True, name="faiss-compact").start()
+
+
+def _compact():
+    """
+    Rebuild the HNSW graph without its tombstones. The graph is built from
+    a snapshot without holding _lock; vectors added meanwhile are carried
+    over when the result is swapped in.
+    """
+    global index, _mmapped, _compacting
+
+    try:
+        with _lock:
+            n0 = index.ntotal
+            stored_ids = faiss.vector_to_array(index.id_map)
+            vectors = index.index.reconstruct_n(0, n0)
+            dropped = set(_tombstones)
+
+        print(f"🧹 Compacting FAISS HNSW graph ({len(dropped)} deleted of {n0})...")
+        keep = ~np.isin(stored_ids, list(dropped))
+        rebuilt = _hnsw_from(vectors[keep], stored_ids[keep])
+        del vectors
+
+        with _lock:
+            # replaced meanwhile (rebuild, upgrade, reused ids): nothing to do
+            current = faiss.vector_to_array(index.id_map) if _kind_of(index) == "hnsw" else None
+            if current is None or len(current) < n0 or not np.array_equal(current[:n0], stored_ids):
+                return
+
+            if index.ntotal > n0:
+                rebuilt.add_with_ids(
+                    index.index.reconstruct_n(n0, index.ntotal - n0), current[n0:]
+                )
+
+            index = rebuilt
+            _mmapped = False
+            _set_tombstones(_tombstones - dropped)
+            _bump_generation()
+            save_index()
+
+        print(f"✅ FAISS HNSW graph compacted to {rebuilt.ntotal} vectors")
+    except Exception as e:
+        print(f"⚠️ FAISS compaction failed: {e}")
+    finally:
+        with _lock:
+            _compacting = False
+
+
+def _ensure_writable():
+    """
+    Swap a memory-mapped (read-only) index for a heap copy before writing.
+    """
+    global index, _mmapped
+
+    if not _mmapped:
+        return
+
+    print("✏️ First FAISS write, loading index into memory...")
+    index, _ = index_io.read_index(FAISS_FILE, mmap=False)
+    _apply_search_params(index)
+    _mmapped = False
+
+
+def save_index():
+    # tombstones first: after a crash in between they may name ids the index
+    # no longer holds (harmless), never miss one it still does
+    if _tombstones:
+        tmp = f"{TOMBSTONE_FILE}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, np.fromiter(_tombstones, dtype="int64", count=len(_tombstones)))
+        os.replace(tmp, TOMBSTONE_FILE)
+    else:
+        TOMBSTONE_FILE.unlink(missing_ok=True)
+
+    index_io.write_index(index, FAISS_FILE)
+    MODEL_FILE.write_text(MODEL_KEY, encoding="utf-8")
+    IDMAP_FILE.unlink(missing_ok=True)
 
 
 def build_faiss_index(force_rebuild=False):
-    global index, id_map
+    global index, _mmapped
 
     STORAGE_DIR.mkdir(parents=True, exist_ok=True)
 
     # ⚡ FAST PATH — load existing index
-    if FAISS_FILE.exists() and IDMAP_FILE.exists() and not force_rebuild:
+    if FAISS_FILE.exists() and not force_rebuild:
         print("⚡ Loading FAISS from disk...")
-        index = faiss.read_index(str(FAISS_FILE))
-        id_map = np.load(IDMAP_FILE).tolist()
-        print(f"Loaded {len(id_map)} vectors instantly")
-        return
+        loaded, mapped = index_io.read_index(FAISS_FILE)
+
+        # files from before the model file are fp32 MiniLM vectors
+        stored_model = (
+            MODEL_FILE.read_text(encoding="utf-8").strip()
+            if MODEL_FILE.exists() else MODEL_NAME
+        )
+
+        # old files were positional (no id map), IVF under an IDMap2 or L2,
+        # or were stored with another codec or embedding backend -> rebuild once
+        if (
+            stored_model == MODEL_KEY
+            and _keyed_by_id(loaded)
+            and loaded.metric_type == faiss.METRIC_INNER_PRODUCT
+            and _codec_of(loaded) == _index_codec(_kind_of(loaded), loaded.ntotal)
+        ):
+            _apply_search_params(loaded)
+            tombstones = (
+                np.load(TOMBSTONE_FILE).tolist()
+                if _kind_of(loaded) == "hnsw" and TOMBSTONE_FILE.exists() else ()
+            )
+            with _lock:
+                index = loaded
+                _mmapped = mapped
+                _set_tombstones(tombstones)
+                _bump_generation()
+            print(f"Loaded {index.ntotal} vectors instantly" + (" (mmap)" if mapped else ""))
+            return
+
+        del loaded
+
+        print("♻️ FAISS on disk does not match config, rebuilding...")
 
     # 🐢 FIRST RUN — build index
     print("🐢 Building FAISS first time...")
 
-    index.reset()
-    id_map = []
+    # held for the whole build so concurrent writes are not lost on swap
+    with _lock:
+        with engine.connect() as conn:
+            n = conn.execute(text("SELECT COUNT(*) FROM memories")).scalar()
+
+        kind = _index_kind(n)
+        new_index = _new_index(kind, n)
+        _train(new_index, n)
+
+        # stream fixed-size batches so peak memory stays bounded
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True).execute(
+                text("SELECT id, content FROM memories")
+            )
+
+            while True:
+                rows = result.fetchmany(BUILD_BATCH_SIZE)
+                if not rows:
+                    break
+
+                ids = np.array([r[0] for r in rows], dtype="int64")
+                new_index.add_with_ids(_embed([r[1] for r in rows]), ids)
+
+        index = new_index
+        _mmapped = False
+        _set_tombstones(())
+        _bump_generation()
+        # ✅ SAVE TO DISK
+        save_index()
+
+    print(f"FAISS built & saved with {index.ntotal} vectors ({kind})")
+
+
+def add_memories(memories):
+    """
+    Append new memories to the index without touching existing vectors.
+
+    memories: list of (memory_id, content)
+    """
+    if not memories:
+        return
+
+    ids = np.array([m[0] for m in memories], dtype="int64")
+    vectors = _embed([m[1] for m in memories])
+
+    global index
+
+    with _lock:
+        _ensure_writable()
+        # re-adding an id would leave a stale duplicate behind
+        index = _remove_ids(index, ids, reused=True)
+        index.add_with_ids(vectors, ids)
+
+        # switch to IVF / the configured codec once there is enough to train on
+        if _needs_upgrade(index):
+            print("🔀 FAISS size threshold crossed, rebuilding index...")
+            build_faiss_index(force_rebuild=True)
+            return
+
+        _bump_generation()
+        save_index()
+
+
+def remove_memories(memory_ids):
+    """
+    Drop vectors for the given memory ids (e.g. a deleted document).
+    """
+    if not memory_ids:
+        return
+
+    global index
+
+    with _lock:
+        _ensure_writable()
+        index = _remove_ids(index, memory_ids)
+        _bump_generation()
+        save_index()
+        _maybe_compact()
+
+
+def _rerank(query_vecs, hit_lists, top_k: int):
+    """
+    Re-score shortlists from a compressed index with the exact float32
+    vectors kept on disk in the embedding cache (one lookup for all
+    queries). Candidates without a cached vector keep their approximate
+    score.
+    """
+    all_ids = {mid for hits in hit_lists for mid, _ in hits}
+    if not all_ids:
+        return hit_lists
 
     with engine.connect() as conn:
-        result = conn.execute(text("SELECT id, content FROM memories"))
-        memories = result.fetchall()
+        rows = conn.execute(
+            text("SELECT id, content FROM memories WHERE id IN :ids")
+            .bindparams(bindparam("ids", expanding=True)),
+            {"ids": list(all_ids)},
+        ).fetchall()
+
+    keys = {r.id: embedding_store.content_hash(r.content) for r in rows}
+    exact = embedding_store.lookup(keys.values(), MODEL_KEY)
 
-    vectors = []
+    reranked = []
+    for query_vec, hits in zip(query_vecs, hit_lists):
+        rescored = []
+        for mid, score in hits:
+            vec = exact.get(keys.get(mid))
+            if vec is not None:
+                score = float(_normalized(vec)[0] @ query_vec)
+            rescored.append((mid, score))
 
-    for mem_id, content in memories:
-        emb = np.array(get_embedding(content)).astype("float32")
-        vectors.append(emb)
-        id_map.append(mem_id)
+        rescored.sort(key=lambda h: h[1], reverse=True)
+        reranked.append(rescored[:top_k])
 
-    if vectors:
-        vectors = np.vstack(vectors)
-        index.add(vectors)
+    return reranked
 
-    # ✅ SAVE TO DISK
-    faiss.write_index(index, str(FAISS_FILE))
-    np.save(IDMAP_FILE, np.array(id_map))
 
-    print(f"FAISS built & saved with {len(id_map)} vectors")
+def search_faiss(query, top_k: int = 3):
+    """
+    query: text or an already computed query embedding
 
-def search_faiss(query: str, top_k: int = 3):
+    Returns:
+        [(memory_id, cosine_similarity)] best first
+    """
     if index.ntotal == 0:
         return []
 
-    query_vec = np.array(get_embedding(query)).astype("float32").reshape(1, -1)
-    distances, indices = index.search(query_vec, top_k)
+    if isinstance(query, str):
+        query = get_embedding(query, cache=False)
+
+    return search_faiss_batch(query, top_k)[0]
+
+
+def search_faiss_batch(query_vecs, top_k: int = 3):
+    """
+    Many queries in one multi-row index search.
+
+    query_vecs: (n, dim) query embeddings
+
+    Returns:
+        one [(memory_id, cosine_similarity)] list per query, best first
+    """
+    query_vecs = _normalized(query_vecs)
+
+    with _lock:
+        if index.ntotal == 0:
+            return [[] for _ in range(len(query_vecs))]
+
+        rerank = RERANK_K > 0 and _codec_of(index) != "fp32"
+        scores, ids = index.search(
+            query_vecs, max(top_k, RERANK_K) if rerank else top_k, params=_search_params(index)
+        )
+
+    results = [
+        [(int(mem_id), float(score)) for mem_id, score in zip(row_ids, row_scores) if mem_id != -1]
+        for row_ids, row_scores in zip(ids, scores)
+    ]
 
-    results = []
-    for idx in indices[0]:
-        if idx != -1 and idx < len(id_map):
-            results.append(id_map[idx])
+    if rerank:
+        return _rerank(query_vecs, results, top_k)
 
     return results
 
+
+def _stored_vectors():
+    """
+    Exact (float32) vectors for every memory, streamed back from the
+    embedding cache.
+
+    Returns:
+        (ids int64 array, vectors float32 matrix)
+    """
+    all_ids, all_vectors = [], []
+
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(
+            text("SELECT id, content FROM memories")
+        )
+
+        while True:
+            rows = result.fetchmany(BUILD_BATCH_SIZE)
+            if not rows:
+                break
+
+            all_ids.append(np.array([r[0] for r in rows], dtype="int64"))
+            all_vectors.append(_embed([r[1] for r in rows]))
+
+    if not all_ids:
+        return np.empty(0, dtype="int64"), np.empty((0, DIMENSION), dtype="float32")
+
+    return np.concatenate(all_ids), np.vstack(all_vectors)
+
+
+def get_index_stats() -> dict:
+    with _lock:
+        idx = index
+        memory = _bytes_per_vector(idx)
+        ntotal = idx.ntotal
+        deleted = len(_tombstones)
+
+    return {
+        "kind": _kind_of(idx),
+        "codec": _codec_of(idx),
+        "configured_type": INDEX_TYPE,
+        "configured_codec": INDEX_CODEC,
+        "ann_threshold": ANN_THRESHOLD,
+        "vectors": ntotal - deleted,
+        "tombstones": deleted,
+        "mmapped": _mmapped,
+        "nprobe": IVF_NPROBE,
+        "ef_search": HNSW_EF_SEARCH,
+        "rerank_k": RERANK_K,
+        **memory,
+        "approx_index_mb": round(memory["approx_bytes_per_vector"] * ntotal / 2**20, 2),
+        "last_recall": last_recall,
+        "generation": generation,
+    }
+
+
+# result of the most recent recall_report, shown in the index stats
+last_recall = None
+
+
+def recall_report(k: int = 10, n_queries: int = 200, nprobe=None, ef_search=None) -> dict:
+    """
+    recall@k of the live index against an exact flat search over the same
+    vectors, using a random sample of stored memories as queries.
+
+    nprobe / ef_search override the search parameters for this report only,
+    so candidate settings can be compared before changing the config.
+    """
+    idx = index
+    ids, vectors = _stored_vectors()
+    if len(ids) == 0:
+        return {"error": "index is empty"}
+
+    exact = faiss.IndexFlatIP(DIMENSION)
+    exact.add(vectors)
+
+    rng = np.random.default_rng(0)
+    picks = rng.choice(len(ids), size=min(n_queries, len(ids)), replace=False)
+    queries = vectors[picks]
+
+    t0 = time.perf_counter()
+    _, exact_pos = exact.search(queries, k)
+    exact_ms = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    with _lock:
+        _, approx_ids = idx.search(queries, k, params=_search_params(idx, nprobe, ef_search))
+    approx_ms = (time.perf_counter() - t0) * 1000
+
+    k_eff = min(k, len(ids))
+
+    def _recall(found):
+        hits = 0
+        for want, got in zip(exact_pos, found):
+            want_ids = set(ids[want[want != -1]].tolist())
+            hits += len(want_ids & set(got[got != -1].tolist()))
+        return round(hits / (len(picks) * k_eff), 4)
+
+    report = {
+        "kind": _kind_of(idx),
+        "codec": _codec_of(idx),
+        "k": k,
+        "queries": len(picks),
+        "nprobe": nprobe or IVF_NPROBE,
+        "ef_search": ef_search or HNSW_EF_SEARCH,
+        f"recall@{k}": _recall(approx_ids),
+        "exact_ms_per_query": round(exact_ms / len(picks), 4),
+        "index_ms_per_query": round(approx_ms / len(picks), 4),
+    }
+
+    # what search_faiss returns for compressed codecs: shortlist + exact re-score
+    if RERANK_K > 0 and _codec_of(idx) != "fp32":
+        position = {mid: i for i, mid in enumerate(ids.tolist())}
+        with _lock:
+            _, shortlist = idx.search(
+                queries, max(k, RERANK_K), params=_search_params(idx, nprobe, ef_search)
+            )
+
+        reranked = np.full((len(picks), k), -1, dtype="int64")
+        for row, (q, cand) in enumerate(zip(queries, shortlist)):
+            cand = np.array([c for c in cand if c in position], dtype="int64")
+            exact_scores = vectors[[position[c] for c in cand]] @ q
+            best = cand[np.argsort(-exact_scores)[:k]]
+            reranked[row, :len(best)] = best
+
+        report[f"recall@{k}_reranked"] = _recall(reranked)
+
+    global last_recall
+    last_recall = report
+    return report
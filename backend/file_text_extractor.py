@@ -1,5 +1,4 @@
 from pypdf import PdfReader
-import pandas as pd
 
 def extract_text_from_pdf(file_path: str) -> str:
     reader = PdfReader(file_path)
@@ -14,6 +13,8 @@ def extract_text_from_pdf(file_path: str) -> str:
 
 
 def extract_text_from_excel(file_path: str) -> str:
+    import pandas as pd
+
     dfs = pd.read_excel(file_path, sheet_name=None)
     text = ""
 
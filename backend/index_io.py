@@ -0,0 +1,42 @@
+# index_io.py
+
+import os
+
+import faiss
+
+# open saved indexes memory-mapped + read-only (set MMAP_INDEXES=0 to disable)
+MMAP_INDEXES = os.getenv("MMAP_INDEXES", "1") != "0"
+
+_MMAP_FLAGS = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+# newer FAISS can also map flat code arrays, but then refuses to read
+# inverted lists (IVF) that way; those are retried with _MMAP_FLAGS
+_MMAP_IFC = getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+
+
+def read_index(path, mmap: bool = MMAP_INDEXES):
+    """
+    Returns:
+        (index, mmapped)
+
+    A mapped index shares the OS page cache between processes and does not
+    copy the vectors into the heap, but it must not be written to; callers
+    re-read it with mmap=False before the first add / remove.
+    """
+    if mmap:
+        attempts = [_MMAP_FLAGS | _MMAP_IFC, _MMAP_FLAGS] if _MMAP_IFC else [_MMAP_FLAGS]
+        for flags in attempts:
+            try:
+                return faiss.read_index(str(path), flags), True
+            except RuntimeError as e:
+                error = e
+
+        print(f"⚠️ Could not mmap {path} ({error}), loading into memory")
+
+    return faiss.read_index(str(path)), False
+
+
+def write_index(index, path):
+    # write next to the target and swap, so a crash never leaves half a file
+    tmp = f"{path}.tmp"
+    faiss.write_index(index, tmp)
+    os.replace(tmp, str(path))
@@ -0,0 +1,137 @@
+# ingest_jobs.py
+
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+
+from db import engine
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+
+STAGES = ["extract", "clean", "embed", "index"]
+
+
+class IngestJobQueue:
+    """
+    Durable upload ingestion queue.
+
+    Jobs live in the ingest_jobs table, so anything still queued or running
+    when the process stops is picked up again by start().
+
+    handler(job: dict, report) does the actual work, where
+    report(stage, done, total) records per-stage progress.
+    """
+
+    def __init__(self, handler, workers: int = INGEST_WORKERS):
+        self.handler = handler
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    # ---- LIFECYCLE ----
+
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="ingest",
+                )
+
+        with engine.connect() as conn:
+            pending = conn.execute(text("""
+                SELECT id FROM ingest_jobs
+                WHERE status IN ('queued', 'running')
+                ORDER BY created_at
+            """)).fetchall()
+
+        for (job_id,) in pending:
+            print(f"🔁 Resuming ingestion job {job_id}")
+            self._executor.submit(self._run, job_id)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    # ---- JOBS ----
+
+    def enqueue(self, document_id: int, filename: str, file_path: str) -> str:
+        job_id = str(uuid.uuid4())
+
+        with engine.begin() as conn:
+            conn.execute(
+                text("""
+                    INSERT INTO ingest_jobs
+                        (id, document_id, filename, file_path, status, progress)
+                    VALUES (:id, :d, :f, :p, 'queued', :progress)
+                """),
+                {
+                    "id": job_id,
+                    "d": document_id,
+                    "f": filename,
+                    "p": file_path,
+                    "progress": json.dumps({}),
+                },
+            )
+
+        self._executor.submit(self._run, job_id)
+        return job_id
+
+    def get(self, job_id: str):
+        with engine.connect() as conn:
+            row = conn.execute(
+                text("SELECT * FROM ingest_jobs WHERE id = :id"),
+                {"id": job_id},
+            ).fetchone()
+
+        if not row:
+            return None
+
+        job = dict(row._mapping)
+        job["progress"] = json.loads(job["progress"] or "{}")
+        return job
+
+    def _update(self, job_id: str, **fields):
+        fields["id"] = job_id
+        assignments = ", ".join(f"{k} = :{k}" for k in fields if k != "id")
+
+        with engine.begin() as conn:
+            conn.execute(
+                text(f"""
+                    UPDATE ingest_jobs
+                    SET {assignments}, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = :id
+                """),
+                fields,
+            )
+
+    def _run(self, job_id: str):
+        job = self.get(job_id)
+        if not job:
+            return
+
+        progress = job["progress"]
+
+        def report(stage: str, done: int, total: int):
+            progress[stage] = {"done": done, "total": total}
+            self._update(
+                job_id,
+                stage=stage,
+                progress=json.dumps(progress),
+            )
+
+        self._update(job_id, status="running", error=None)
+
+        try:
+            chunks_added = self.handler(job, report)
+        except Exception as e:
+            print(f"❌ Ingestion job {job_id} failed: {e}")
+            self._update(job_id, status="failed", error=str(e))
+            return
+
+        self._update(job_id, status="done", stage=None, chunks_added=chunks_added)
+        print(f"✅ Ingestion job {job_id} done ({chunks_added} chunks)")
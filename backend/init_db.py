@@ -1,8 +1,16 @@
 from sqlalchemy import text
 from db import engine
+import migrations
 print("ENGINE URL:", engine.url)
 
 
+def _add_column(conn, table: str, column: str, decl: str):
+    # SQLite has no ADD COLUMN IF NOT EXISTS
+    columns = [r[1] for r in conn.execute(text(f"PRAGMA table_info({table})"))]
+    if column not in columns:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {decl}"))
+
+
 def init_db():
     with engine.connect() as conn:
         conn.execute(text("PRAGMA journal_mode=WAL;"))
@@ -46,6 +54,98 @@ def init_db():
         );
         """))
 
+        # -------- face_index_ids --------
+        # FAISS face vector id <-> faces.id (UUID)
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS face_index_ids (
+            vec_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            face_id TEXT UNIQUE
+        );
+        """))
+
+        # -------- content hashes (upload dedup) --------
+        _add_column(conn, "documents", "content_hash", "TEXT")
+        _add_column(conn, "faces", "content_hash", "TEXT")   # hash of the source photo
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS idx_documents_content_hash ON documents (content_hash)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS idx_faces_content_hash ON faces (content_hash)"
+        ))
+
+        # -------- face_clusters (online identity clustering) --------
+        # vector_sum = float32 sum of member embeddings; centroid = normalized sum
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS face_clusters (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            size INTEGER DEFAULT 0,
+            vector_sum BLOB,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+        """))
+        _add_column(conn, "faces", "cluster_id", "INTEGER")
+        _add_column(conn, "face_clusters", "label", "TEXT")   # propagated to faces.label
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS idx_faces_cluster_id ON faces (cluster_id)"
+        ))
+
+        # -------- embedding_cache --------
+        # content_hash = sha256 of whitespace-normalized text
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS embedding_cache (
+            content_hash TEXT,
+            model TEXT,
+            vector BLOB,
+            PRIMARY KEY (content_hash, model)
+        );
+        """))
+
+        # -------- ingest_jobs --------
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS ingest_jobs (
+            id TEXT PRIMARY KEY,
+            document_id INTEGER,
+            filename TEXT,
+            file_path TEXT,
+            status TEXT,
+            stage TEXT,
+            progress TEXT,
+            error TEXT,
+            chunks_added INTEGER,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+        """))
+
+        # -------- face imports (bulk, resumable) --------
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS face_imports (
+            id TEXT PRIMARY KEY,
+            source TEXT,
+            status TEXT,
+            total INTEGER DEFAULT 0,
+            done INTEGER DEFAULT 0,
+            faces INTEGER DEFAULT 0,
+            error TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+        """))
+
+        # one row per finished photo: done / duplicate / no_face
+        conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS face_import_items (
+            import_id TEXT,
+            item TEXT,
+            status TEXT,
+            PRIMARY KEY (import_id, item)
+        );
+        """))
+
         conn.commit()
 
+        # indexes and later schema changes (PRAGMA user_version)
+        migrations.migrate(conn)
+
     print("✅ SQLite tables ready")
@@ -1,51 +1,109 @@
 # label_propagation.py
 
+from sqlalchemy import text, bindparam
+
+from db import engine
+
+
 class LabelPropagation:
     """
     Manages editable identity labels at cluster level.
-    Labels are NOT stored per face.
-    """
 
-    def __init__(self):
-        # cluster_id -> label
-        self.cluster_labels = {}
+    Labels live in face_clusters.label (cluster_id -> label); setting one
+    copies it onto every member face with a single UPDATE.
+    """
 
     # ---- LABEL OPERATIONS ----
 
+    def _store(self, cluster_id: int, label):
+        # one transaction for the cluster row and all of its faces
+        with engine.begin() as conn:
+            conn.execute(
+                text("UPDATE face_clusters SET label = :label WHERE id = :c"),
+                {"label": label, "c": cluster_id},
+            )
+            updated = conn.execute(
+                text("UPDATE faces SET label = :label WHERE cluster_id = :c"),
+                {"label": label, "c": cluster_id},
+            ).rowcount
+
+        return updated
+
     def set_label(self, cluster_id: int, label: str):
+        """
+        Returns:
+            number of faces relabelled
+        """
         if cluster_id == -1:
             raise ValueError("Cannot label noise cluster (-1)")
-        self.cluster_labels[cluster_id] = label
+        return self._store(cluster_id, label)
 
     def rename_label(self, cluster_id: int, new_label: str):
-        if cluster_id not in self.cluster_labels:
+        if self.get_label(cluster_id) is None:
             raise KeyError("Cluster has no label to rename")
-        self.cluster_labels[cluster_id] = new_label
+        return self._store(cluster_id, new_label)
 
     def remove_label(self, cluster_id: int):
-        if cluster_id in self.cluster_labels:
-            del self.cluster_labels[cluster_id]
+        if self.get_label(cluster_id) is not None:
+            self._store(cluster_id, None)
+
+    def get_label(self, cluster_id: int, conn=None):
+        if conn is None:
+            with engine.connect() as conn:
+                return self.get_label(cluster_id, conn)
+
+        row = conn.execute(
+            text("SELECT label FROM face_clusters WHERE id = :c"),
+            {"c": cluster_id},
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_labels(self, cluster_ids, conn) -> dict:
+        """
+        Returns:
+            cluster_id -> label (labelled clusters only)
+        """
+        if not cluster_ids:
+            return {}
 
-    def get_label(self, cluster_id: int):
-        return self.cluster_labels.get(cluster_id)
+        rows = conn.execute(
+            text("""
+                SELECT id, label FROM face_clusters
+                WHERE id IN :ids AND label IS NOT NULL
+            """).bindparams(bindparam("ids", expanding=True)),
+            {"ids": list(set(cluster_ids))},
+        ).fetchall()
+        return dict(rows)
 
     # ---- PROPAGATION (READ-ONLY) ----
 
-    def propagate_labels(self, cluster_map: dict):
+    def propagate_labels(self, cluster_map: dict = None):
         """
-        cluster_map: face_id -> cluster_id
+        cluster_map: face_id -> cluster_id (default: faces.cluster_id)
 
         Returns:
             face_id -> {label, source}
         """
-        labeled_faces = {}
+        if cluster_map is not None:
+            with engine.connect() as conn:
+                labels = self.get_labels(list(cluster_map.values()), conn)
+            return {
+                face_id: {"label": labels[cluster_id], "source": "propagated"}
+                for face_id, cluster_id in cluster_map.items()
+                if cluster_id in labels
+            }
 
-        for face_id, cluster_id in cluster_map.items():
-            label = self.get_label(cluster_id)
-            if label:
-                labeled_faces[face_id] = {
-                    "label": label,
-                    "source": "propagated"
-                }
+        with engine.connect() as conn:
+            rows = conn.execute(
+                text("""
+                    SELECT f.id, c.label
+                    FROM faces f
+                    JOIN face_clusters c ON c.id = f.cluster_id
+                    WHERE c.label IS NOT NULL
+                """)
+            ).fetchall()
 
-        return labeled_faces
+        return {
+            face_id: {"label": label, "source": "propagated"}
+            for face_id, label in rows
+        }
@@ -1,75 +1,109 @@
-import pytesseract
-from PIL import Image
 import re
 
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+from ocr_executor import ocr_image
 
 
 def extract_ocr_chunks(image_path):
-    img = Image.open(image_path)
+    # OCR runs in the process pool (tall images as parallel bands)
+    return chunks_from_ocr_data(ocr_image(image_path))
 
-    df = pytesseract.image_to_data(
-        img,
-        output_type=pytesseract.Output.DATAFRAME
-    )
 
-    df = df.dropna()
-    df = df[df.text.str.strip() != ""]
-
-    # group by block
-    blocks = {}
-    for _, row in df.iterrows():
-        blocks.setdefault(row["block_num"], []).append(row)
-
-    # merge small blocks
-    merged = []
-    buffer = []
-    for block in blocks.values():
-        text = " ".join(r["text"] for r in block)
-        if len(text.split()) < 5:
-            buffer.extend(block)
-        else:
-            if buffer:
-                merged.append(buffer)
-                buffer = []
-            merged.append(block)
-    if buffer:
-        merged.append(buffer)
+def chunks_from_ocr_data(data):
+    """
+    Group pytesseract image_to_data output (DICT) into heading / body
+    chunks, one or more per layout block.
 
-    chunks = []
+    Returns:
+    [
+      {
+        "heading": "..." or None,
+        "content": "...",
+        "bbox": [x1, y1, x2, y2]   # of the whole block
+      }
+    ]
+    """
+    import pandas as pd
 
-    for block in merged:
-        # group by line
-        lines = {}
-        for r in block:
-            lines.setdefault(r["line_num"], []).append(r)
+    df = pd.DataFrame(data)
 
-        line_info = []
-        for words in lines.values():
-            text = " ".join(w["text"] for w in words)
-            height = sum(w["height"] for w in words) / len(words)
-            line_info.append((text.strip(), height))
+    df = df.dropna()
+    df = df[df.text.astype(str).str.strip() != ""]
 
-        if not line_info:
-            continue
+    if df.empty:
+        return []
 
-        heights = sorted(h for _, h in line_info)
-        median = heights[len(heights) // 2]
+    df = df.assign(text=df.text.astype(str))
 
-        heading = None
-        body_lines = []
+    # group by block (first-appearance order, rows in original order)
+    df = df.assign(block=pd.factorize(df.block_num)[0])
+    df = df.sort_values("block", kind="stable")
 
-        first_text, first_height = line_info[0]
+    # merge small blocks: runs of blocks under 5 words become one group
+    block_words = df.text.str.split().str.len().groupby(df.block).sum()
 
-        if first_height >= median * 1.3 or (
-            len(first_text) <= 40 and len(first_text.split()) <= 5
-        ):
-            heading = first_text
-            body_lines = [t for t, _ in line_info[1:]]
+    block_group = []
+    group = -1
+    in_buffer = False
+    for n_words in block_words.to_numpy():
+        if n_words < 5:
+            if not in_buffer:
+                group += 1
+                in_buffer = True
         else:
-            body_lines = [t for t, _ in line_info]
+            group += 1
+            in_buffer = False
+        block_group.append(group)
+
+    df = df.assign(group=pd.Series(block_group).to_numpy()[df.block.to_numpy()])
+
+    # bbox of every merged group
+    boxes = df.assign(
+        right=df.left + df.width,
+        bottom=df.top + df.height,
+    ).groupby("group").agg(
+        x1=("left", "min"),
+        y1=("top", "min"),
+        x2=("right", "max"),
+        y2=("bottom", "max"),
+    )
+
+    # group by line (first-appearance order inside each group)
+    lines = df.groupby(["group", "line_num"], sort=False).agg(
+        text=("text", " ".join),
+        height=("height", "mean"),
+    ).reset_index()
+    lines = lines.assign(text=lines.text.str.strip())
+
+    # upper median of line heights per group
+    by_height = lines.sort_values(["group", "height"], kind="stable")
+    rank = by_height.groupby("group").cumcount()
+    size = by_height.groupby("group").height.transform("size")
+    median = by_height.height[rank == size // 2].groupby(by_height.group).first()
+
+    # heading detection on the first line of every group
+    first = lines.groupby("group", sort=False).head(1).set_index("group")
+    is_heading = (first.height >= median.reindex(first.index) * 1.3) | (
+        (first.text.str.len() <= 40) & (first.text.str.split().str.len() <= 5)
+    )
+
+    first_line = pd.Series(False, index=lines.index)
+    first_line[lines.groupby("group", sort=False).head(1).index] = True
+    is_body = ~(first_line & lines.group.map(is_heading))
+
+    bodies = lines[is_body].groupby("group", sort=False).text.agg(" ".join).to_dict()
+
+    # plain Python values for the per-group loop (no per-row pandas indexing)
+    bbox_of = dict(zip(boxes.index, boxes[["x1", "y1", "x2", "y2"]].to_numpy().tolist()))
+    first_text = first.text.to_dict()
+
+    chunks = []
+
+    for group, heading_flag in is_heading.items():
+        heading = first_text[group] if heading_flag else None
+
+        bbox = [int(v) for v in bbox_of[group]]
 
-        body = " ".join(body_lines)
+        body = bodies.get(group, "")
         body = re.sub(r"\s+", " ", body).strip()
 
         # chunk safely
@@ -85,7 +119,8 @@ def extract_ocr_chunks(image_path):
             if len(chunk) > 20:
                 chunks.append({
                     "heading": heading,
-                    "content": chunk
+                    "content": chunk,
+                    "bbox": bbox,
                 })
             start = split
 
@@ -0,0 +1,126 @@
+# lexical_search.py
+#
+# BM25 over memories via the memories_fts FTS5 table (kept in sync by
+# triggers, see migrations.py) and reciprocal-rank fusion with FAISS hits.
+
+import os
+import re
+
+from sqlalchemy import text, bindparam
+
+from db import engine
+
+# queries of at most this many whitespace-separated terms whose terms all
+# occur in some memory are answered lexically (no embedding); 0 disables
+LEXICAL_ONLY_MAX_TERMS = int(os.getenv("LEXICAL_ONLY_MAX_TERMS", "2"))
+RRF_K = 60
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# left out of queries: they occur in almost every memory and would let
+# "what is the capital of france" match anything containing "the"
+_STOPWORDS = frozenset("""
+    a an and are as at be been but by can could did do does for from had
+    has have he her his how i if in into is it its me my no not of on or
+    our she so than that the their them then there these they this to us
+    was we were what when where which who whom why will with would you your
+""".split())
+
+
+def _terms(query: str) -> list:
+    # distinct content words, in query order
+    tokens = _TOKEN.findall(query.lower())
+    return list(dict.fromkeys(t for t in tokens if t not in _STOPWORDS))
+
+
+def _match_expression(terms, operator: str):
+    # quoted tokens: FTS5 syntax characters in user text are never parsed
+    if not terms:
+        return None
+    return f" {operator} ".join(f'"{t}"' for t in terms)
+
+
+def _search(expression, top_k):
+    if expression is None:
+        return []
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("""
+                SELECT rowid, bm25(memories_fts) AS score
+                FROM memories_fts
+                WHERE memories_fts MATCH :q
+                ORDER BY score
+                LIMIT :k
+            """),
+            {"q": expression, "k": top_k},
+        ).fetchall()
+
+    # bm25() is lower-is-better; flip so higher is better like FAISS
+    return [(int(r.rowid), -float(r.score)) for r in rows]
+
+
+def search_bm25(query: str, top_k: int = 10):
+    """
+    Memories containing any content term of the query (stopwords are
+    dropped), BM25 ranked.
+
+    Returns:
+        [(memory_id, bm25_score)] best first
+    """
+    return _search(_match_expression(_terms(query), "OR"), top_k)
+
+
+def covering(query: str, memory_ids) -> set:
+    """
+    The memories among memory_ids that contain every content term of the
+    query, i.e. search_bm25 hits that are as good as an exact match.
+    """
+    expression = _match_expression(_terms(query), "AND")
+    memory_ids = list(memory_ids)
+    if expression is None or not memory_ids:
+        return set()
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("""
+                SELECT rowid
+                FROM memories_fts
+                WHERE memories_fts MATCH :q AND rowid IN :ids
+            """).bindparams(bindparam("ids", expanding=True)),
+            {"q": expression, "ids": memory_ids},
+        ).fetchall()
+
+    return {int(r.rowid) for r in rows}
+
+
+def exact_hits(query: str, top_k: int = 10):
+    """
+    For short exact-token lookups ("dbms", "INV-2024-0042"): memories that
+    contain every term. Empty for longer queries or when nothing matches.
+
+    Returns:
+        [(memory_id, bm25_score)] best first
+    """
+    if not 0 < len(query.split()) <= LEXICAL_ONLY_MAX_TERMS:
+        return []
+    return _search(_match_expression(_terms(query), "AND"), top_k)
+
+
+def rrf_fuse(*rankings):
+    """
+    Reciprocal-rank fusion: score = sum of 1 / (RRF_K + rank) over the
+    rankings an id appears in.
+
+    Args:
+        rankings: lists of (id, score), best first
+
+    Returns:
+        [(id, fused_score)] best first
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, (item_id, _) in enumerate(ranking, 1):
+            fused[item_id] = fused.get(item_id, 0.0) + 1.0 / (RRF_K + rank)
+
+    return sorted(fused.items(), key=lambda kv: kv[1], reverse=True)
@@ -1,8 +1,12 @@
-from fastapi import FastAPI, UploadFile, File
+import time
+BOOT_STARTED = time.perf_counter()   # before the heavy imports below
+
+from fastapi import FastAPI, UploadFile, File, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from sqlalchemy import text
+from typing import List, Optional
+from sqlalchemy import text, bindparam
 from pathlib import Path
 import numpy as np
 import shutil
@@ -17,28 +21,51 @@ from fastapi.middleware.cors import CORSMiddleware
 # =========================
 from db import engine
 from init_db import init_db
-from ai import get_embedding
+from ai import get_embedding, get_embeddings
+import embedding_store
 from text_cleaner import clean_text
 from document_grounding import extract_pdf_chunks
 from file_text_extractor import (
     extract_text_from_pdf,
     extract_text_from_excel,
 )
-from faiss_index import search_faiss, build_faiss_index
+import faiss_index
+import query_cache
+from faiss_index import (
+    search_faiss,
+    search_faiss_batch,
+    build_faiss_index,
+    add_memories,
+    remove_memories,
+)
 from layout_ocr import extract_ocr_chunks
+from ingest_jobs import IngestJobQueue
+import uploads
+from face_executor import FaceExecutor, FaceQueueFull
+from starlette.concurrency import run_in_threadpool
+import threading
+import warmup
+import lexical_search
+from concurrent.futures import ThreadPoolExecutor
 
 
 # =========================
 # FACE MEMORY (PHASE 4)
 # =========================
 from face_detection import detect_and_crop_faces
-from face_embedding import get_face_embedding
+from face_embedding import get_face_embeddings
 from face_index import (
     load_index,
+    save_index,
+    ensure_writable,
     add_face_embedding,
+    remove_faces,
     search_similar_faces,
+    face_embeddings_for,
 )
+from face_clustering import OnlineFaceClusters
 from label_propagation import LabelPropagation
+import face_import
 
 # =========================
 # SMART QUERY ROUTER
@@ -57,13 +84,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],   # keyset pagination
 )
 
 
 # =========================
 # INIT SYSTEMS
 # =========================
-face_index = load_index()
+face_index = None   # loaded at startup, once the id mapping table exists
+face_index_lock = threading.Lock()   # face workers share the index
+face_executor = FaceExecutor()
+face_clusters = OnlineFaceClusters()   # guarded by face_index_lock for writes
 label_manager = LabelPropagation()
 query_router = SmartQueryRouter()
 
@@ -71,6 +102,7 @@ APP_DATA = Path(os.getenv("APPDATA", Path.home()))
 BASE_DIR = APP_DATA / "AI_Memory_Assistant"
 SETUP_FLAG = BASE_DIR / "storage" / "setup_done.flag"
 UPLOAD_DIR = BASE_DIR / "storage" / "uploads"
+INGEST_EMBED_BATCH = 64  # chunks per progress step in the embed stage
 FACE_IMG_DIR = BASE_DIR / "storage" / "face_images"
 PHOTO_DIR = BASE_DIR / "storage" / "photos"
 UNLABELED_DIR = PHOTO_DIR / "unlabelled"
@@ -78,6 +110,34 @@ UNLABELED_DIR = PHOTO_DIR / "unlabelled"
 PHOTO_DIR.mkdir(parents=True, exist_ok=True)
 UNLABELED_DIR.mkdir(parents=True, exist_ok=True)
 
+# list endpoints return one page when called with limit or cursor (the
+# next page starts after X-Next-Cursor); without either, everything, as
+# older clients expect
+PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = 500
+
+
+def _page(rows, limit: Optional[int], response: Response, cursor_of):
+    """
+    rows were fetched with LIMIT limit + 1; the extra row only tells that
+    another page exists. limit None = unpaginated request.
+    """
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(cursor_of(rows[-1]))
+    return rows
+
+
+def _limit(limit: Optional[int], cursor) -> Optional[int]:
+    if limit is None and cursor is None:
+        return None
+    return max(1, min(limit or PAGE_SIZE, MAX_PAGE_SIZE))
+
+
+def _sql_limit(limit: Optional[int]) -> int:
+    # one extra row to detect a next page; -1 = no LIMIT in SQLite
+    return -1 if limit is None else limit + 1
+
 
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 FACE_IMG_DIR.mkdir(parents=True, exist_ok=True)
@@ -113,6 +173,23 @@ def first_time_setup():
 
     print("✅ First setup completed")
 
+def _rss_mb():
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().rss / 2**20, 1)
+    except ImportError:
+        pass
+
+    try:
+        import resource
+        # ru_maxrss is KB on Linux (peak, close enough right after boot)
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:
+        return None
+
+
+boot_stats = {}
+
 @app.on_event("startup")
 def startup_event():
 
@@ -121,6 +198,39 @@ def startup_event():
         else:
             print("⚡ Fast startup (setup already done)")
             init_db()   # quick check only
+            build_faiss_index()   # load from disk (writes are incremental)
+
+        global face_index
+        face_index = load_index()
+
+        with engine.begin() as conn:
+            n_clusters = face_clusters.load(conn)
+            # faces stored before online clustering
+            backfilled = face_clusters.backfill(
+                conn, lambda ids: face_embeddings_for(face_index, ids)
+            )
+        print(f"🧩 Face clusters loaded: {n_clusters}")
+        if backfilled:
+            print(f"🧩 Clustered {backfilled} existing faces")
+
+        # picks up jobs left unfinished by the last run
+        job_queue.start()
+
+        boot_stats.update({
+            "startup_seconds": round(time.perf_counter() - BOOT_STARTED, 3),
+            "rss_mb": _rss_mb(),
+            "text_index_vectors": faiss_index.index.ntotal,
+            "text_index_mmapped": faiss_index._mmapped,
+            "face_index_vectors": face_index.ntotal,
+            "face_clusters": len(face_clusters.sizes),
+        })
+        print(
+            f"🚀 Backend ready in {boot_stats['startup_seconds']}s, "
+            f"RSS {boot_stats['rss_mb']} MB"
+        )
+
+        # models load lazily; warm them off the request path
+        warmup.start()
 
 
 # =========================
@@ -140,58 +250,131 @@ class MemoryRequest(BaseModel):
 def add_memory(request: MemoryRequest):
     print(request)
     with engine.connect() as conn:
-        conn.execute(
+        result = conn.execute(
             text("INSERT INTO memories (content) VALUES (:c)"),
             {"c": request.content},
         )
+        memory_id = result.lastrowid
         conn.commit()
 
-    build_faiss_index(force_rebuild=True)
+    add_memories([(memory_id, request.content)])
     return {"status": "memory saved"}
 
+# hybrid retrieval: FAISS (dense) + FTS5 BM25 (lexical), fused by rank
+HYBRID_DENSE_K = int(os.getenv("HYBRID_DENSE_K", "3"))
+HYBRID_LEXICAL_K = int(os.getenv("HYBRID_LEXICAL_K", "10"))
+DENSE_MIN_SCORE = 0.25   # cosine; below it a dense-only hit is not an answer
+_search_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search")
+
+
+def get_query_embedding(query: str):
+    key = query_cache.normalize_query(query)
+
+    query_vec = query_cache.embedding_cache.get(key)
+    if query_vec is None:
+        # not written to the on-disk cache: one-off texts, the LRU has repeats
+        query_vec = get_embedding(key, cache=False)
+        query_cache.embedding_cache.put(key, query_vec)
+
+    return query_vec
+
+
+def get_query_embeddings(queries):
+    """
+    (len(queries), dim) query embeddings; LRU misses are encoded together.
+    """
+    keys = [query_cache.normalize_query(q) for q in queries]
+    vecs = {k: query_cache.embedding_cache.get(k) for k in set(keys)}
+
+    missing = [k for k, v in vecs.items() if v is None]
+    if missing:
+        for k, v in zip(missing, get_embeddings(missing, cache=False)):
+            query_cache.embedding_cache.put(k, v)
+            vecs[k] = v
+
+    return np.vstack([vecs[k] for k in keys])
+
+
 def text_search_pipeline(query: str):
-    query_vec = np.array(get_embedding(query)).astype("float32")
-    memory_ids = search_faiss(query, top_k=5)
+    # results are only valid for the index generation they were computed on
+    cache_key = (query_cache.normalize_query(query), faiss_index.generation)
 
-    if not memory_ids:
-        return {
-            "answer": "I don’t have enough information yet.",
-            "evidence": None
-        }
+    cached = query_cache.result_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-    best_score = -1
-    best_row = None
+    result = _text_search(query)
+    query_cache.result_cache.put(cache_key, result)
+    return result
 
-    with engine.connect() as conn:
-        for mid in memory_ids:
-            row = conn.execute(
-                text("""
-                    SELECT 
-                        m.id,
-                        m.content,
-                        d.id AS document_id,
-                        d.filename
-                    FROM memories m
-                    LEFT JOIN document_memories dm ON dm.memory_id = m.id
-                    LEFT JOIN documents d ON d.id = dm.document_id
-                    WHERE m.id = :id
-                """),
-                {"id": mid},
-            ).fetchone()
 
-            if not row:
-                continue
+def _dense_hits(query: str):
+    return search_faiss(get_query_embedding(query), top_k=HYBRID_DENSE_K)
 
-            mem_vec = np.array(get_embedding(row.content)).astype("float32")
-            score = np.dot(query_vec, mem_vec) / (
-                np.linalg.norm(query_vec) * np.linalg.norm(mem_vec)
-            )
 
-            if score > best_score:
-                best_score = score
-                best_row = row
+def _text_search(query: str):
+    # exact-token lookups ("dbms", invoice numbers): BM25 alone, no encode
+    lexical = lexical_search.exact_hits(query, top_k=HYBRID_LEXICAL_K)
+    if lexical:
+        dense = []
+        trusted = {i for i, _ in lexical}
+    else:
+        # BM25 and encode + FAISS at the same time
+        dense_future = _search_pool.submit(_dense_hits, query)
+        lexical = lexical_search.search_bm25(query, top_k=HYBRID_LEXICAL_K)
+        trusted = lexical_search.covering(query, [i for i, _ in lexical])
+        dense = dense_future.result()
+
+    candidates = _rank_candidates(dense, lexical, trusted)
+    rows = _memory_rows(candidates)
+
+    best_row = next((rows[i] for i in candidates if i in rows), None)
+    return _answer(best_row)
+
+
+def _rank_candidates(dense, lexical, trusted):
+    """
+    Reciprocal-rank fusion of FAISS and BM25 hits. Lexical hits stand on
+    their own only when trusted (they contain every query term); all other
+    candidates need a cosine of at least DENSE_MIN_SCORE.
+
+    Returns:
+        [memory_id] best first
+    """
+    dense_scores = dict(dense)
+
+    return [
+        memory_id
+        for memory_id, _ in lexical_search.rrf_fuse(dense, lexical)
+        if memory_id in trusted or dense_scores.get(memory_id, 0.0) >= DENSE_MIN_SCORE
+    ]
+
+
+def _memory_rows(memory_ids) -> dict:
+    if not memory_ids:
+        return {}
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("""
+                SELECT 
+                    m.id,
+                    m.content,
+                    d.id AS document_id,
+                    d.filename
+                FROM memories m
+                LEFT JOIN document_memories dm ON dm.memory_id = m.id
+                LEFT JOIN documents d ON d.id = dm.document_id
+                WHERE m.id IN :ids
+            """).bindparams(bindparam("ids", expanding=True)),
+            {"ids": list(memory_ids)},
+        ).fetchall()
+
+    return {r.id: r for r in rows}
+
 
-    if best_score < 0.25 or not best_row:
+def _answer(best_row):
+    if not best_row:
         return {
             "answer": "I don’t have enough information yet.",
             "evidence": None
@@ -199,7 +382,7 @@ def text_search_pipeline(query: str):
  
     evidence = None
 
-    if best_row and best_row.filename:
+    if best_row.filename:
         evidence = {
             "document_id": best_row.document_id,
             "filename": best_row.filename,
@@ -224,83 +407,199 @@ def text_search_pipeline(query: str):
 @app.post("/face/upload")
 async def upload_face(file: UploadFile = File(...)):
 
-    original_image_path = UNLABELED_DIR / file.filename
-    image_path = original_image_path
+    temp_path, content_hash = await uploads.stream_to_temp(file, UNLABELED_DIR)
+
+    # same photo uploaded before -> return its faces, skip detection
+    rows = await run_in_threadpool(_faces_for_photo, content_hash)
 
+    if rows:
+        uploads.discard(temp_path)
+        return {
+            "duplicate": True,
+            "faces": [
+                {
+                    "face_id": r.id,
+                    "unmatched": r.label is None,
+                    "label": r.label,
+                    "image_url": f"http://127.0.0.1:8000/files/face_images/{r.id}.jpg"
+                }
+                for r in rows
+            ],
+        }
 
-    with open(image_path, "wb") as f:
-        f.write(await file.read())
+    # detection / embedding / SQL run on the face executor, not the event loop
+    try:
+        result, timings = await face_executor.run(
+            process_face_photo, temp_path, file.filename, content_hash
+        )
+    except FaceQueueFull:
+        uploads.discard(temp_path)
+        raise HTTPException(
+            status_code=429,
+            detail="Face engine busy, retry later",
+            headers={"Retry-After": str(face_executor.retry_after)},
+        )
+
+    result["timings"] = timings
+    return result
+
+
+def _faces_for_photo(content_hash: str):
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT id, label FROM faces WHERE content_hash = :h"),
+            {"h": content_hash},
+        ).fetchall()
+
+
+def process_face_photo(temp_path: Path, filename: str, content_hash: str):
+    global face_index
+
+    original_image_path = uploads.finalize(temp_path, UNLABELED_DIR, filename)
+    image_path = original_image_path
 
     faces = detect_and_crop_faces(str(image_path))
     if not faces:
         return {"error": "No face detected"}
 
-    from face_index import save_index
-
     response_faces = []
 
+    # all faces of the photo in one FaceNet batch, straight from memory
+    embeddings = get_face_embeddings([face["crop"] for face in faces])
+
+    # image_url must not point at a crop still being written
     for face in faces:
+        face["crop_saved"].result()
 
-        emb = get_face_embedding(face["face_path"])
-        if emb is None:
-            continue
+    with face_index_lock:
+        face_index = ensure_writable(face_index)
 
-        results = search_similar_faces(face_index, emb, top_k=1)
+        for face, emb in zip(faces, embeddings):
+            if emb is None:
+                continue
 
-        label = None
-        unmatched = True
+            results = search_similar_faces(face_index, emb, top_k=1)
+            unmatched = not (results and results[0]["similarity"] > 0.75)
 
-        if results and results[0]["similarity"] > 0.75:
-            unmatched = False
+            add_face_embedding(face_index, face["face_id"], emb)
 
             with engine.connect() as conn:
-                row = conn.execute(
-                    text("SELECT label FROM faces WHERE id=:id"),
-                    {"id": results[0]["face_id"]},
-                ).fetchone()
+                cluster_id = face_clusters.assign(conn, [emb])[0]
+
+                # the identity's label comes with its cluster
+                label = label_manager.get_label(cluster_id, conn)
+
+                if label:
+                    label_folder = PHOTO_DIR / label.lower()
+                    label_folder.mkdir(parents=True, exist_ok=True)
+
+                    new_path = label_folder / image_path.name
+
+                    if original_image_path.exists() and not new_path.exists():
+                        shutil.copy2(original_image_path, new_path)
+
+                conn.execute(
+                    text("""
+                        INSERT INTO faces (id, image_path, label, content_hash, cluster_id)
+                        VALUES (:id, :path, :label, :h, :c)
+                    """),
+                    {
+                        "id": face["face_id"],
+                        "path": str(image_path),
+                        "label": label,
+                        "h": content_hash,
+                        "c": cluster_id,
+                    },
+                )
+                conn.commit()
+
+            response_faces.append({
+                "face_id": face["face_id"],
+                "cluster_id": cluster_id,
+                "unmatched": unmatched,
+                "label": label,
+                "image_url": f"http://127.0.0.1:8000/files/face_images/{Path(face['face_path']).name}"
+            })
+
+        save_index(face_index)
+
+        if face_clusters.maintenance_due():
+            _maintain_face_clusters()
+
+    return {"faces": response_faces}
+
+
+def _maintain_face_clusters():
+    # caller holds face_index_lock
+    with engine.begin() as conn:
+        result = face_clusters.maintain(
+            conn, lambda ids: face_embeddings_for(face_index, ids)
+        )
+    print(f"🧩 Face clusters maintained: {result}")
+    return result
 
-                if row:
-                    label = row[0]
-                
-                    if label:
-                        label_folder = PHOTO_DIR / label.lower()
-                        label_folder.mkdir(parents=True, exist_ok=True)
 
-                        new_path = label_folder / image_path.name
+@app.get("/face/clusters")
+def list_face_clusters():
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("""
+                SELECT id, size, updated_at
+                FROM face_clusters
+                ORDER BY size DESC
+            """)
+        ).fetchall()
+    return [dict(r._mapping) for r in rows]
 
-                        if original_image_path.exists() and not new_path.exists():
-                            shutil.copy2(original_image_path, new_path)
 
+@app.post("/face/clusters/maintain")
+def maintain_face_clusters():
+    with face_index_lock:
+        return _maintain_face_clusters()
 
 
-        
+# =========================
+# FACE BULK IMPORT
+# =========================
+class FaceImportRequest(BaseModel):
+    path: str                      # folder or .zip on this machine
+    resume_id: Optional[str] = None
 
-        add_face_embedding(face_index, face["face_id"], emb)
 
-        with engine.connect() as conn:
-            conn.execute(
-                text("""
-                    INSERT INTO faces (id, image_path, label)
-                    VALUES (:id, :path, :label)
-                """),
-                {
-                    "id": face["face_id"],
-                    "path": str(image_path),
-                    "label": label,
-                },
-            )
-            conn.commit()
+def _set_face_index(index):
+    global face_index
+    face_index = index
 
-        response_faces.append({
-            "face_id": face["face_id"],
-            "unmatched": unmatched,
-            "label": label,
-            "image_url": f"http://127.0.0.1:8000/files/face_images/{Path(face['face_path']).name}"
-        })
 
-    save_index(face_index)
+face_import_handle = face_import.IndexHandle(
+    get=lambda: face_index,
+    set=_set_face_index,
+    lock=face_index_lock,
+    clusters=face_clusters,
+    labels=label_manager,
+)
 
-    return {"faces": response_faces}
+
+@app.post("/face/import")
+def start_face_import(request: FaceImportRequest):
+    if not os.path.exists(request.path):
+        raise HTTPException(status_code=400, detail="Path not found")
+
+    if request.resume_id and not face_import.get_import(request.resume_id):
+        raise HTTPException(status_code=404, detail="Import not found")
+
+    import_id = face_import.start_import(
+        request.path, face_import_handle, import_id=request.resume_id
+    )
+    return {"status": "running", "import_id": import_id}
+
+
+@app.get("/face/import/{import_id}")
+def get_face_import(import_id: str):
+    job = face_import.get_import(import_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job
 
 
 
@@ -310,56 +609,75 @@ class FaceLabelRequest(BaseModel):
 
 @app.post("/face/label")
 def label_face(req: FaceLabelRequest):
-
+    # the client sends a face id; the label goes to that face's whole cluster
     with engine.connect() as conn:
-
         row = conn.execute(
-            text("SELECT image_path FROM faces WHERE id=:id"),
+            text("SELECT cluster_id FROM faces WHERE id=:id"),
             {"id": req.cluster_id}
         ).fetchone()
 
-        if row:
-            image_path = Path(row[0])
-            label_folder = PHOTO_DIR / req.label.lower()
-            label_folder.mkdir(parents=True, exist_ok=True)
-
-            new_path = label_folder / image_path.name
-
-            if image_path.exists() and not new_path.exists():
-                shutil.copy2(image_path, new_path)
-
+    if not row:
+        raise HTTPException(status_code=404, detail="Face not found")
 
+    if row.cluster_id is None:
+        with engine.begin() as conn:
             conn.execute(
+                text("UPDATE faces SET label=:label WHERE id=:id"),
+                {"label": req.label, "id": req.cluster_id},
+            )
+        relabelled = 1
+    else:
+        relabelled = label_manager.set_label(row.cluster_id, req.label)
+
+    # photos of every member face into the label folder
+    with engine.connect() as conn:
+        paths = [
+            r[0] for r in conn.execute(
                 text("""
-                    UPDATE faces
-                    SET label=:label, image_path=:path
-                    WHERE id=:id
+                    SELECT DISTINCT image_path FROM faces
+                    WHERE cluster_id = :c OR id = :id
                 """),
-                {
-                    "label": req.label,
-                    "path": str(new_path),
-                    "id": req.cluster_id
-                },
-            )
+                {"c": row.cluster_id, "id": req.cluster_id},
+            ).fetchall()
+        ]
 
-        conn.commit()
+    label_folder = PHOTO_DIR / req.label.lower()
+    label_folder.mkdir(parents=True, exist_ok=True)
+
+    for path in paths:
+        image_path = Path(path)
+        new_path = label_folder / image_path.name
+        if image_path.exists() and not new_path.exists():
+            shutil.copy2(image_path, new_path)
 
-    return {"status": "label saved"}
+    return {"status": "label saved", "faces": relabelled}
 
 
 
 @app.get("/face/search-by-label")
-def search_face_by_label(label: str):
+def search_face_by_label(
+    label: str,
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[int] = None,
+):
+    limit = _limit(limit, cursor)
+
+    # idx_faces_label_lower holds (LOWER(label), rowid): seek + ordered scan
     with engine.connect() as conn:
         rows = conn.execute(
             text("""
-                SELECT image_path, label,id
+                SELECT rowid, image_path, label, id
                 FROM faces
-                WHERE LOWER(label) = LOWER(:label)
+                WHERE LOWER(label) = LOWER(:label) AND rowid > :after
+                ORDER BY rowid
+                LIMIT :n
             """),
-            {"label": label},
+            {"label": label, "after": cursor or 0, "n": _sql_limit(limit)},
         ).fetchall()
 
+    rows = _page(rows, limit, response, lambda r: r.rowid)
+
     images = []
     for r in rows:
         filename = Path(r.image_path).name
@@ -376,11 +694,58 @@ def search_face_by_label(label: str):
 
 @app.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
-    file_path = UPLOAD_DIR / file.filename
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
+    temp_path, content_hash = await uploads.stream_to_temp(file, UPLOAD_DIR)
+
+    # SQL and the file move block: run them in the threadpool, off the loop
+    return await run_in_threadpool(_store_upload, temp_path, file.filename, content_hash)
 
-    filename = file.filename.lower()
+
+def _store_upload(temp_path, original_name: str, content_hash: str) -> dict:
+    # identical content already ingested -> no extraction / embedding at all
+    with engine.connect() as conn:
+        existing = conn.execute(
+            text("""
+                SELECT d.id, d.file_path, j.id AS job_id, j.status
+                FROM documents d
+                LEFT JOIN ingest_jobs j ON j.document_id = d.id
+                WHERE d.content_hash = :h
+                ORDER BY j.created_at DESC, j.rowid DESC
+                LIMIT 1
+            """),
+            {"h": content_hash},
+        ).fetchone()
+
+    # done / queued / running (no job = ingested before the job queue)
+    if existing and existing.status != "failed":
+        uploads.discard(temp_path)
+        return {
+            "status": "duplicate",
+            "job_id": existing.job_id,
+            "document_id": existing.id,
+        }
+
+    if existing:
+        # its last ingest failed: run it again for the same document
+        file_path = Path(existing.file_path) if existing.file_path else None
+        if file_path and file_path.exists():
+            uploads.discard(temp_path)
+        else:
+            file_path = uploads.finalize(temp_path, UPLOAD_DIR, original_name)
+            with engine.begin() as conn:
+                conn.execute(
+                    text("UPDATE documents SET filename = :f, file_path = :p WHERE id = :id"),
+                    {"f": file_path.name, "p": str(file_path), "id": existing.id},
+                )
+
+        job_id = job_queue.enqueue(existing.id, file_path.name, str(file_path))
+        return {
+            "status": "queued",
+            "job_id": job_id,
+            "document_id": existing.id,
+        }
+
+    file_path = uploads.finalize(temp_path, UPLOAD_DIR, original_name)
+    filename = file_path.name.lower()
 
     # 1️⃣ INSERT DOCUMENT
     with engine.connect() as conn:
@@ -394,26 +759,57 @@ async def upload_file(file: UploadFile = File(...)):
 
         result = conn.execute(
             text("""
-                INSERT INTO documents (filename, file_path, file_type)
-                VALUES (:f, :p, :t)
+                INSERT INTO documents (filename, file_path, file_type, content_hash)
+                VALUES (:f, :p, :t, :h)
             """),
             {
-                "f": file.filename,
+                # stored name: a different file may already own the original
+                "f": file_path.name,
                 "p": str(file_path),
                 "t": file_type,
+                "h": content_hash,
             },
         )
 
         document_id = result.lastrowid
         conn.commit()
 
-    texts = []
+    # 2️⃣ EXTRACT / EMBED / INDEX IN THE BACKGROUND
+    job_id = job_queue.enqueue(document_id, file_path.name, str(file_path))
+
+    return {
+        "status": "queued",
+        "job_id": job_id,
+        "document_id": document_id,
+    }
+
+
+def ingest_document(job: dict, report):
+    """
+    Ingestion job handler: extract -> clean -> embed -> index.
+    Safe to re-run for a document (resumed jobs start over).
+    """
+    document_id = job["document_id"]
+    file_path = job["file_path"]
+    filename = job["filename"].lower()
+
+    with engine.connect() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM documents WHERE id = :id"),
+            {"id": document_id},
+        ).fetchone()
+
+    if not exists:
+        raise ValueError("Document was deleted before ingestion")
 
+    # 1️⃣ EXTRACT
+    report("extract", 0, 1)
 
+    texts = []
 
     if filename.endswith(".pdf"):
 
-        pdf_chunks = extract_pdf_chunks(str(file_path))
+        pdf_chunks = extract_pdf_chunks(file_path)
 
         for chunk in pdf_chunks:
             content = chunk["content"]
@@ -424,22 +820,53 @@ async def upload_file(file: UploadFile = File(...)):
             if len(content) > 40:
                 texts.append(content)
 
-
-
     elif filename.endswith((".xls", ".xlsx")):
-        texts.append(extract_text_from_excel(str(file_path)))
+        texts.append(extract_text_from_excel(file_path))
 
     else:
-        ocr_chunks = extract_ocr_chunks(str(file_path))
+        ocr_chunks = extract_ocr_chunks(file_path)
         texts.extend([c["content"] for c in ocr_chunks])
 
-    # 2️⃣ STORE MEMORIES + LINK
+    report("extract", 1, 1)
+
+    # 2️⃣ CLEAN
+    cleaned = []
+    for t in texts:
+        t = clean_text(t)
+        if len(t) >= 20:
+            cleaned.append(t)
+
+    report("clean", len(texts), len(texts))
+
+    # 3️⃣ EMBED (vectors land in the embedding cache, indexing reuses them)
+    total = len(cleaned)
+    report("embed", 0, total)
+
+    for start in range(0, total, INGEST_EMBED_BATCH):
+        get_embeddings(cleaned[start:start + INGEST_EMBED_BATCH])
+        report("embed", min(start + INGEST_EMBED_BATCH, total), total)
+
+    # 4️⃣ STORE MEMORIES + LINK, ADD TO FAISS
+    report("index", 0, total)
+    new_memories = []
+
     with engine.connect() as conn:
-        for t in texts:
-            t = clean_text(t)
-            if len(t) < 20:
-                continue
+        # rows left behind by an interrupted attempt
+        stale = conn.execute(
+            text("SELECT id, content FROM memories WHERE document_id = :id"),
+            {"id": document_id},
+        ).fetchall()
+        stale_ids = [r.id for r in stale]
+        conn.execute(
+            text("DELETE FROM document_memories WHERE document_id = :id"),
+            {"id": document_id},
+        )
+        conn.execute(
+            text("DELETE FROM memories WHERE document_id = :id"),
+            {"id": document_id},
+        )
 
+        for t in cleaned:
             result = conn.execute(
                 text("""
                     INSERT INTO memories (content, document_id)
@@ -449,6 +876,7 @@ async def upload_file(file: UploadFile = File(...)):
                 {"c": t, "doc_id": document_id},
             )
             memory_id = result.lastrowid
+            new_memories.append((memory_id, t))
 
             conn.execute(
                 text("""
@@ -460,14 +888,24 @@ async def upload_file(file: UploadFile = File(...)):
 
         conn.commit()
 
-    # 3️⃣ REBUILD FAISS
-    build_faiss_index(force_rebuild=True)
+    remove_memories(stale_ids)
+    # after the new rows: vectors of text that is still there are kept
+    embedding_store.forget([r.content for r in stale])
+    add_memories(new_memories)
+    report("index", total, total)
+
+    return len(new_memories)
 
-    return {
-        "status": "file processed",
-        "document_id": document_id,
-        "chunks_added": len(texts),
-    }
+
+job_queue = IngestJobQueue(ingest_document)
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 # =========================
 # SMART QUERY
@@ -494,12 +932,104 @@ def smart_query(request: SmartQueryRequest):
     }
 
 
+class SmartQueryBatchRequest(BaseModel):
+    queries: List[str]
+
+MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", "256"))
+
+@app.post("/smart-query/batch")
+def smart_query_batch(request: SmartQueryBatchRequest):
+    """
+    Many questions in one call: one encode batch, one multi-row FAISS
+    search and one SQL round trip for the candidate rows.
+    """
+    queries = request.queries
+    if len(queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_QUERIES} queries per batch",
+        )
+
+    routes = [query_router.detect_route(q) for q in queries]
+    generation = faiss_index.generation
+    answers = {}
+    pending = []
+
+    for i, (q, route) in enumerate(zip(queries, routes)):
+        if route not in (QueryRoute.TEXT, QueryRoute.OCR, QueryRoute.HYBRID):
+            continue
+        cached = query_cache.result_cache.get((query_cache.normalize_query(q), generation))
+        if cached is not None:
+            answers[i] = cached
+        else:
+            pending.append(i)
+
+    # short exact-token lookups are answered by BM25 alone (no encode)
+    lexical = {i: lexical_search.exact_hits(queries[i], top_k=HYBRID_LEXICAL_K) for i in pending}
+    trusted = {i: {m for m, _ in lexical[i]} for i in pending}
+    dense_needed = [i for i in pending if not lexical[i]]
+    dense = {i: [] for i in pending}
+
+    def _bm25(i):
+        hits = lexical_search.search_bm25(queries[i], top_k=HYBRID_LEXICAL_K)
+        return hits, lexical_search.covering(queries[i], [m for m, _ in hits])
+
+    if dense_needed:
+        # BM25 for the rest runs while the batch is encoded and searched
+        bm25_future = _search_pool.submit(lambda: [_bm25(i) for i in dense_needed])
+        vecs = get_query_embeddings([queries[i] for i in dense_needed])
+        dense.update(zip(dense_needed, search_faiss_batch(vecs, top_k=HYBRID_DENSE_K)))
+        for i, (hits, covered) in zip(dense_needed, bm25_future.result()):
+            lexical[i] = hits
+            trusted[i] = covered
+
+    candidates = {i: _rank_candidates(dense[i], lexical[i], trusted[i]) for i in pending}
+    rows = _memory_rows({m for ids in candidates.values() for m in ids})
+
+    for i in pending:
+        best_row = next((rows[m] for m in candidates[i] if m in rows), None)
+        answers[i] = _answer(best_row)
+        query_cache.result_cache.put(
+            (query_cache.normalize_query(queries[i]), generation), answers[i]
+        )
+
+    results = []
+    for i, (q, route) in enumerate(zip(queries, routes)):
+        if i in answers:
+            results.append({
+                "query": q,
+                "route": route,
+                "answer": answers[i]["answer"],
+                "evidence": answers[i]["evidence"],
+            })
+        else:
+            results.append({
+                "query": q,
+                "route": "FACE",
+                "message": "Please upload an image for face search",
+            })
+
+    return {"results": results}
+
+
 
 @app.get("/documents")
-def get_documents():
+def get_documents(response: Response, limit: Optional[int] = None, cursor: Optional[int] = None):
+    limit = _limit(limit, cursor)
+
     with engine.connect() as conn:
-        result = conn.execute(text("SELECT * FROM documents"))
-        rows = result.fetchall()
+        rows = conn.execute(
+            text("""
+                SELECT id, filename, file_path, file_type
+                FROM documents
+                WHERE id > :after
+                ORDER BY id
+                LIMIT :n
+            """),
+            {"after": cursor or 0, "n": _sql_limit(limit)},
+        ).fetchall()
+
+    rows = _page(rows, limit, response, lambda r: r.id)
 
     docs = []
 
@@ -518,38 +1048,36 @@ def get_documents():
 
 
 @app.get("/face/folders")
-def get_face_folders():
-    with engine.connect() as conn:
-        rows = conn.execute(text("""
-            SELECT label, image_path
-            FROM faces
-            WHERE label IS NOT NULL
-        """)).fetchall()
-
-    folders = {}
-
-    for r in rows:
-        label = r.label.lower()
-        filename = Path(r.image_path).name
-
-        url = f"http://127.0.0.1:8000/files/photos/{label}/{filename}"
-
-        if label not in folders:
-            folders[label] = []
+def get_face_folders(response: Response, limit: Optional[int] = None, cursor: Optional[str] = None):
+    limit = _limit(limit, cursor)
 
-        folders[label].append(url)
-
-    # Convert into frontend-friendly structure
-    result = []
+    # one row per folder, grouped along idx_faces_label_lower; with MIN()
+    # SQLite takes image_path from the same (first stored) row -> preview
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(f"""
+                SELECT LOWER(label) AS label, COUNT(*) AS count,
+                       image_path, MIN(rowid) AS first_rowid
+                FROM faces
+                WHERE LOWER(label) IS NOT NULL
+                {"AND LOWER(label) > :after" if cursor is not None else ""}
+                GROUP BY LOWER(label)
+                ORDER BY LOWER(label)
+                LIMIT :n
+            """),
+            {"after": cursor, "n": _sql_limit(limit)},
+        ).fetchall()
 
-    for label, images in folders.items():
-        result.append({
-            "label": label,
-            "preview_url": images[0],   # first image as folder preview
-            "count": len(images)
-        })
+    rows = _page(rows, limit, response, lambda r: r.label)
 
-    return result
+    return [
+        {
+            "label": r.label,
+            "preview_url": f"http://127.0.0.1:8000/files/photos/{r.label}/{Path(r.image_path).name}",
+            "count": r.count,
+        }
+        for r in rows
+    ]
 
 
 @app.delete("/document/{document_id}")
@@ -565,6 +1093,12 @@ def delete_document(document_id: str):
 
         file_path = row.file_path
 
+        memories = conn.execute(
+            text("SELECT id, content FROM memories WHERE document_id = :id"),
+            {"id": document_id},
+        ).fetchall()
+        memory_ids = [r.id for r in memories]
+
         # Remove file from disk
         if file_path and os.path.exists(file_path):
             os.remove(file_path)
@@ -585,8 +1119,9 @@ def delete_document(document_id: str):
         )
         conn.commit()
 
-    # rebuild FAISS after deletion
-    build_faiss_index(force_rebuild=True)
+    # drop the document's vectors from FAISS and the embedding cache
+    remove_memories(memory_ids)
+    embedding_store.forget([r.content for r in memories])
 
     return {"status": "deleted"}
 
@@ -608,11 +1143,11 @@ def share_document(document_id: str):
     }
 
 @app.delete("/faces/{face_id}")
-async def delete_face(face_id: str):
+def delete_face(face_id: str):
     with engine.begin() as conn:
 
         row = conn.execute(
-            text("SELECT image_path FROM faces WHERE id=:id"),
+            text("SELECT image_path, cluster_id FROM faces WHERE id=:id"),
             {"id": face_id}
         ).fetchone()
 
@@ -628,24 +1163,86 @@ async def delete_face(face_id: str):
         )
         conn.commit()
 
+    # drop the vector too, so the face is no longer matched
+    global face_index
+    with face_index_lock:
+        if row.cluster_id is not None:
+            emb = face_embeddings_for(face_index, [face_id]).get(face_id)
+            if emb is not None:
+                with engine.begin() as conn:
+                    face_clusters.unassign(conn, row.cluster_id, emb)
+
+        face_index = ensure_writable(face_index)
+        remove_faces(face_index, [face_id])
+        save_index(face_index)
+
     # remove file from storage
     if image_path and os.path.exists(image_path):
         os.remove(image_path)
 
     return {"message": "Face deleted"}
 
+@app.on_event("shutdown")
+def shutdown_event():
+    job_queue.shutdown()
+
 @app.get("/health")
 def health():
+    if "first_health_seconds" not in boot_stats:
+        boot_stats["first_health_seconds"] = round(time.perf_counter() - BOOT_STARTED, 3)
     return {"status": "ok"}
 
+@app.get("/ready")
+def ready():
+    return warmup.status()
+
+@app.get("/face/engine")
+def face_engine_stats():
+    return face_executor.stats()
+
+@app.get("/boot-stats")
+def get_boot_stats():
+    return boot_stats
+
+@app.get("/index/stats")
+def index_stats():
+    return faiss_index.get_index_stats()
+
+@app.get("/index/recall")
+def index_recall(k: int = 10, queries: int = 200, nprobe: int = None, ef_search: int = None):
+    return faiss_index.recall_report(k=k, n_queries=queries, nprobe=nprobe, ef_search=ef_search)
+
+@app.get("/query-cache")
+def query_cache_stats():
+    return {
+        "index_generation": faiss_index.generation,
+        "query_embeddings": query_cache.embedding_cache.stats(),
+        "results": query_cache.result_cache.stats(),
+    }
+
+@app.delete("/query-cache")
+def clear_query_cache():
+    query_cache.embedding_cache.clear()
+    query_cache.result_cache.clear()
+    return {"status": "cleared"}
+
+@app.get("/embedding-cache")
+def embedding_cache_stats():
+    return embedding_store.get_stats()
+
 @app.get("/warmup-ai")
 def warmup_ai():
     print("🔥 AI warmup triggered")
-    from ai import get_embedding
-    get_embedding("warmup")
-    return {"status": "AI ready"}
+    result = warmup.load("text_embedding")
+    if result["state"] != "ready":
+        raise HTTPException(status_code=503, detail=result.get("error"))
+    return {"status": "AI ready", "seconds": result["seconds"]}
 
 if __name__ == "__main__":
+    # the OCR process pool needs this in the frozen (PyInstaller) build
+    import multiprocessing
+    multiprocessing.freeze_support()
+
     import uvicorn
     uvicorn.run(
         app,
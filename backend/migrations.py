@@ -0,0 +1,86 @@
+# migrations.py
+#
+# Versioned schema changes on top of the tables created by init_db.
+# The applied version is kept in PRAGMA user_version; each migration runs
+# once, in its own transaction, in order. Append new ones, never edit old.
+
+from sqlalchemy import text
+
+MIGRATIONS = [
+    (1, "indexes for the hot document / memory queries", [
+        # text search: memories -> document_memories -> documents
+        "CREATE INDEX IF NOT EXISTS idx_document_memories_memory"
+        " ON document_memories (memory_id, document_id)",
+        # re-ingest / delete: WHERE document_id = :id
+        "CREATE INDEX IF NOT EXISTS idx_document_memories_document"
+        " ON document_memories (document_id, memory_id)",
+        "CREATE INDEX IF NOT EXISTS idx_memories_document_id"
+        " ON memories (document_id)",
+        # upload dedup: documents LEFT JOIN ingest_jobs
+        "CREATE INDEX IF NOT EXISTS idx_ingest_jobs_document_id"
+        " ON ingest_jobs (document_id, created_at)",
+    ]),
+    (2, "case-insensitive face label index", [
+        # matches WHERE LOWER(label) = LOWER(:label) exactly
+        "CREATE INDEX IF NOT EXISTS idx_faces_label_lower"
+        " ON faces (LOWER(label))",
+    ]),
+    (3, "planner statistics", [
+        "ANALYZE",
+    ]),
+    (4, "full-text index over memories (BM25)", [
+        # external content: the text is stored once, in memories
+        "CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5("
+        " content, content='memories', content_rowid='id',"
+        " tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS memories_fts_insert AFTER INSERT ON memories BEGIN"
+        " INSERT INTO memories_fts (rowid, content) VALUES (new.id, new.content);"
+        " END",
+        "CREATE TRIGGER IF NOT EXISTS memories_fts_delete AFTER DELETE ON memories BEGIN"
+        " INSERT INTO memories_fts (memories_fts, rowid, content)"
+        " VALUES ('delete', old.id, old.content);"
+        " END",
+        "CREATE TRIGGER IF NOT EXISTS memories_fts_update AFTER UPDATE OF content ON memories BEGIN"
+        " INSERT INTO memories_fts (memories_fts, rowid, content)"
+        " VALUES ('delete', old.id, old.content);"
+        " INSERT INTO memories_fts (rowid, content) VALUES (new.id, new.content);"
+        " END",
+        # index the memories stored so far
+        "INSERT INTO memories_fts (memories_fts) VALUES ('rebuild')",
+    ]),
+]
+
+
+def current_version(conn) -> int:
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+
+def migrate(conn) -> list:
+    """
+    Apply pending migrations. conn must not be inside a transaction.
+
+    Returns:
+        [version, ...] applied now
+    """
+    version = current_version(conn)
+    # the PRAGMA read autobegins a transaction; end it before begin()
+    conn.commit()
+    applied = []
+
+    for number, name, statements in MIGRATIONS:
+        if number <= version:
+            continue
+
+        with conn.begin():
+            # pysqlite only opens a transaction before DML, so DDL would
+            # autocommit statement by statement; open it explicitly
+            conn.exec_driver_sql("BEGIN")
+            for sql in statements:
+                conn.execute(text(sql))
+            # PRAGMA does not take bound parameters
+            conn.execute(text(f"PRAGMA user_version = {int(number)}"))
+
+        print(f"🛠️ Migration {number}: {name}")
+        applied.append(number)
+
+    return applied
@@ -0,0 +1,154 @@
+# ocr_executor.py
+
+import io
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+# Tesseract is single-threaded per call: one process per core
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+PDF_OCR_DPI = int(os.getenv("PDF_OCR_DPI", "300"))
+# rendered PDF pages waiting for / in OCR (a 300 dpi A4 PNG is a few MB):
+# enough to keep every worker busy while the next page renders
+OCR_PDF_WINDOW = OCR_WORKERS * 2
+# images taller than this are OCR'd as horizontal bands in parallel
+# (well above a 4032 px phone photo: only long scans / screenshots)
+OCR_TILE_HEIGHT = int(os.getenv("OCR_TILE_HEIGHT", "8000"))
+# neighbouring bands share this many pixels, so a text line cut at one
+# band's edge is whole in the other (lines up to half of it tall)
+OCR_TILE_OVERLAP = int(os.getenv("OCR_TILE_OVERLAP", "200"))
+
+TESSERACT_CMD = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+
+# keeps block numbers of different tiles apart after merging
+_BLOCK_STRIDE = 10000
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    # requests OCR from several threads; only one may create the pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=OCR_WORKERS)
+    return _pool
+
+
+def _ocr_worker(png: bytes, tesseract_cmd: str) -> dict:
+    # runs in a worker process; settings from the parent are not inherited
+    import pytesseract
+
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    img = Image.open(io.BytesIO(png))
+    return pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT)
+
+
+def _to_png(img) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _run(pngs) -> list:
+    """
+    OCR every image across the pool; results come back in input order.
+    """
+    return list(get_pool().map(_ocr_worker, pngs, [TESSERACT_CMD] * len(pngs)))
+
+
+def _merge_tiles(results, offsets, height: int) -> dict:
+    """
+    Stitch per-tile image_to_data dicts into one, shifting words back to
+    full-image coordinates. Overlapping bands are split at the middle of
+    the overlap; each entry is kept only by the band whose share holds
+    its vertical centre, so nothing is read twice.
+    """
+    half = OCR_TILE_OVERLAP // 2
+    merged = {}
+
+    for tile, (data, top_offset) in enumerate(zip(results, offsets)):
+        lo = top_offset + half if tile else 0
+        hi = offsets[tile + 1] + half if tile + 1 < len(offsets) else height
+        keep = [
+            i for i, (top, h) in enumerate(zip(data["top"], data["height"]))
+            if lo <= top_offset + top + h / 2 < hi
+        ]
+
+        for key, values in data.items():
+            values = [values[i] for i in keep]
+            if key == "top":
+                values = [v + top_offset for v in values]
+            elif key == "block_num":
+                values = [v + tile * _BLOCK_STRIDE for v in values]
+            merged.setdefault(key, []).extend(values)
+
+    return merged
+
+
+def ocr_image(image_path: str) -> dict:
+    """
+    pytesseract image_to_data (DICT) for one image; tall images are split
+    into bands that are OCR'd in parallel.
+    """
+    img = Image.open(image_path)
+    img.load()
+
+    width, height = img.size
+    if height <= OCR_TILE_HEIGHT + OCR_TILE_OVERLAP:
+        return _run([_to_png(img)])[0]
+
+    # the last band runs to the bottom edge (no sliver bands)
+    offsets = list(range(0, height - OCR_TILE_OVERLAP, OCR_TILE_HEIGHT))
+    tiles = [
+        _to_png(img.crop((
+            0, top, width, min(top + OCR_TILE_HEIGHT + OCR_TILE_OVERLAP, height)
+        )))
+        for top in offsets
+    ]
+
+    return _merge_tiles(_run(tiles), offsets, height)
+
+
+def ocr_pdf_pages(pdf_path: str, pages) -> dict:
+    """
+    Render the given PDF pages and OCR them in parallel. Pages are
+    rendered as the pool drains, so at most OCR_PDF_WINDOW rendered
+    pages are held in memory at once, however long the PDF.
+
+    Returns:
+        page_index -> (image_to_data DICT, scale)
+        where scale converts pixel coordinates back to PDF points
+    """
+    import fitz  # PyMuPDF
+
+    pages = list(pages)
+    if not pages:
+        return {}
+
+    pool = get_pool()
+    scale = 72 / PDF_OCR_DPI
+    results = {}
+    in_flight = deque()
+
+    doc = fitz.open(pdf_path)
+    try:
+        for page in pages:
+            # window full: collect the oldest page before rendering another
+            if len(in_flight) >= OCR_PDF_WINDOW:
+                done_page, future = in_flight.popleft()
+                results[done_page] = (future.result(), scale)
+
+            png = doc[page].get_pixmap(dpi=PDF_OCR_DPI).tobytes("png")
+            in_flight.append((page, pool.submit(_ocr_worker, png, TESSERACT_CMD)))
+
+        for page, future in in_flight:
+            results[page] = (future.result(), scale)
+    finally:
+        doc.close()
+
+    return results
@@ -0,0 +1,81 @@
+# query_cache.py
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query or "").strip().lower()
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU with an optional TTL (seconds, 0 = no expiry).
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()   # key -> (stored_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+
+            if item is not None and self.ttl and time.monotonic() - item[0] > self.ttl:
+                del self._data[key]
+                item = None
+
+            if item is None:
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+            }
+
+
+# query text -> embedding (independent of the index contents)
+embedding_cache = LRUCache(
+    max_size=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "0")),
+)
+
+# (query text, index generation) -> text_search_pipeline result
+result_cache = LRUCache(
+    max_size=int(os.getenv("QUERY_RESULT_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("QUERY_RESULT_CACHE_TTL", "600")),
+)
@@ -0,0 +1,59 @@
+# uploads.py
+
+import hashlib
+import os
+import uuid
+from pathlib import Path
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+
+async def stream_to_temp(file, directory: Path):
+    """
+    Stream an UploadFile to a temp file in `directory` while hashing it,
+    without holding the whole upload in memory.
+
+    Returns:
+        (temp_path, sha256 hex digest)
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    temp_path = directory / f".{uuid.uuid4().hex}.part"
+    sha = hashlib.sha256()
+
+    with open(temp_path, "wb") as f:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            sha.update(chunk)
+            f.write(chunk)
+
+    return temp_path, sha.hexdigest()
+
+
+def unique_path(directory: Path, filename: str) -> Path:
+    """
+    directory/filename, or "name (1).ext", "name (2).ext", ... when a
+    different file already uses that name.
+    """
+    name = Path(filename).name
+    path = directory / name
+    stem, suffix = path.stem, path.suffix
+
+    n = 1
+    while path.exists():
+        path = directory / f"{stem} ({n}){suffix}"
+        n += 1
+
+    return path
+
+
+def finalize(temp_path: Path, directory: Path, filename: str) -> Path:
+    final_path = unique_path(directory, filename)
+    os.replace(temp_path, final_path)
+    return final_path
+
+
+def discard(temp_path: Path):
+    if temp_path.exists():
+        temp_path.unlink()
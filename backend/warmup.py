@@ -0,0 +1,109 @@
+# warmup.py
+#
+# Heavy engines (SentenceTransformer, MTCNN/TensorFlow, FaceNet/torch,
+# the OCR stack) are loaded lazily by their modules. This loads them in
+# parallel in the background after startup and reports what is ready.
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# engines warmed after startup (comma separated, empty = none)
+WARMUP_ENGINES = os.getenv(
+    "WARMUP_ENGINES", "text_embedding,face_detection,face_embedding,ocr"
+)
+
+
+def _load_text_embedding():
+    import ai
+    ai.get_model()
+    return ai.load_seconds
+
+
+def _load_face_detection():
+    import face_detection
+    face_detection.get_detector()
+    return face_detection.load_seconds
+
+
+def _load_face_embedding():
+    import face_embedding
+    face_embedding.get_model()
+    return face_embedding.load_seconds
+
+
+def _load_ocr():
+    import pandas  # noqa: F401
+    import fitz  # noqa: F401
+    import pytesseract  # noqa: F401
+    return None
+
+
+ENGINES = {
+    "text_embedding": _load_text_embedding,
+    "face_detection": _load_face_detection,
+    "face_embedding": _load_face_embedding,
+    "ocr": _load_ocr,
+}
+
+_state = {name: {"state": "not_loaded"} for name in ENGINES}
+_lock = threading.Lock()
+
+
+def load(name: str) -> dict:
+    """
+    Load one engine (no-op when already loaded).
+
+    Returns:
+        {"state": "ready" | "failed", "seconds": ..., "error": ...}
+    """
+    with _lock:
+        if _state[name]["state"] == "ready":
+            return dict(_state[name])
+        _state[name] = {"state": "loading"}
+
+    started = time.perf_counter()
+    try:
+        seconds = ENGINES[name]()
+        entry = {
+            "state": "ready",
+            # the accessor's own timing (covers loads triggered by requests)
+            "seconds": seconds if seconds is not None
+            else round(time.perf_counter() - started, 3),
+        }
+    except Exception as e:
+        entry = {"state": "failed", "error": str(e)}
+        print(f"⚠️ Warmup of {name} failed: {e}")
+
+    with _lock:
+        _state[name] = entry
+    return dict(entry)
+
+
+def start(names=None):
+    """
+    Warm engines in parallel on background threads; returns immediately.
+    """
+    if names is None:
+        names = [n.strip() for n in WARMUP_ENGINES.split(",") if n.strip()]
+    names = [n for n in names if n in ENGINES]
+    if not names:
+        return
+
+    pool = ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="warmup")
+    for name in names:
+        pool.submit(load, name)
+    pool.shutdown(wait=False)
+
+    print(f"🔥 Warming up in background: {', '.join(names)}")
+
+
+def status() -> dict:
+    with _lock:
+        engines = {name: dict(entry) for name, entry in _state.items()}
+
+    return {
+        "ready": all(e["state"] == "ready" for e in engines.values()),
+        "engines": engines,
+    }